@@ -1,6 +1,9 @@
 from pytermfx.terminal import Terminal
 from pytermfx.color import Color, ColorMode, NamedColor
 from pytermfx.style import Style
+from pytermfx.screen import ScreenBuffer
+from pytermfx.canvas import Canvas
+from pytermfx.compositor import Compositor
 import pytermfx.keys
 import pytermfx.escapes
 import pytermfx.tools
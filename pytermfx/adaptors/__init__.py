@@ -1,6 +1,8 @@
 import platform
 from pytermfx.adaptors.base import BaseAdaptor
-from pytermfx.adaptors.input import InputAdaptor
+from pytermfx.adaptors.input import InputAdaptor, FdInputAdaptor
+from pytermfx.adaptors.headless import HeadlessAdaptor
+from pytermfx.adaptors.virtual import VirtualAdaptor, VirtualScreen
 try:
     import sys
     STDIN = sys.stdin
@@ -1,17 +1,40 @@
 from functools import partial
 from pytermfx.escapes import parse_escape
+from pytermfx.keys import MouseEvent
+from collections import deque
+from pytermfx.color import ColorMode
+from pytermfx.style import Style
+from pytermfx.metrics import FlushRecord
 import os
+import select
+import time
 
 class BaseAdaptor:
+    # largest single write to the terminal, or None to write each flush at once
+    chunk_size = None
+
     def __init__(self, input_file, output_file, resize_handler=lambda: None):
         self.in_file = input_file
         self.out_file = output_file
         self.resize_handler = resize_handler
-        self._buffer = []
+        self._encoding = getattr(output_file, "encoding", None) or "utf-8"
+        try:
+            self._out_fd = output_file.fileno()
+        except (AttributeError, ValueError, OSError):
+            self._out_fd = None
+        self._buffer = bytearray()  # encoded output
+        self._writes = 0            # number of writes in the buffer
         self._cbreak = False
-        self._getch_buffer = []
+        self._getch_buffer = deque()
+        self._mouse_coalesce = True
+        self._mouse_history = False
+        self._size = None
+        self._color_mode = ColorMode.MODE_256
+        self._metrics = None
+        self._frame_depth = 0
+        self._sync_output = None  # synchronized output support; None if unknown
 
-    def mouse_enable(self, mode):
+    def mouse_enable(self, mode, protocol="sgr", coalesce=True, history=False):
         """Enable experimental mouse support.
         """
         return NotImplemented
@@ -39,7 +62,34 @@ class BaseAdaptor:
         # read and buffer control sequences
         while len(self._getch_buffer) == 0:
             self._getch_buffer += parse_escape(self.getch_raw())
-        return self._getch_buffer.pop(0)
+            # take everything else that has already arrived
+            while self.input_ready():
+                self._getch_buffer += parse_escape(self.getch_raw())
+            if self._mouse_coalesce:
+                self._coalesce_motion()
+        return self._getch_buffer.popleft()
+
+    def _coalesce_motion(self):
+        """Collapse consecutive mouse motion events with the same buttons
+        into the most recent one.
+        """
+        events = deque()
+        for event in self._getch_buffer:
+            prev = events[-1] if events else None
+            if (isinstance(event, MouseEvent) and event.moved and
+                isinstance(prev, MouseEvent) and prev.moved and
+                (prev.left, prev.right) == (event.left, event.right)):
+                events.pop()
+                if self._mouse_history:
+                    event.history = (prev.history or []) + [(prev.x, prev.y)]
+            events.append(event)
+        self._getch_buffer.clear()
+        self._getch_buffer.extend(events)
+
+    def input_ready(self):
+        """Check whether input can be read without blocking.
+        """
+        return False
 
     def getch_raw(self):
         """Get a single character sequence from stdin in cbreak mode.
@@ -57,18 +107,113 @@ class BaseAdaptor:
     def write(self, *things):
         """Write an arbitrary number of things to the buffer.
         """
-        self._buffer += map(lambda i: str(i), things)
+        if len(things) == 1 and type(things[0]) is str:
+            text = things[0]
+        else:
+            text = "".join(map(str, things))
+        self._buffer += text.encode(self._encoding, "replace")
+        self._writes += 1
 
     def writeln(self, *things):
         """Writes an arbitrary number of things to the buffer with a newline.
         """
         self.write(*things, os.linesep)
 
+    def write_runs(self, runs):
+        """Write runs of text at given positions. runs is an iterable of
+        (x, y, styles, text) tuples, where styles is a tuple of Colors and
+        Styles applied over Style.none.
+        """
+        for x, y, styles, text in runs:
+            self.cursor_to(x, y)
+            self.style(Style.none, *styles)
+            self.write(text)
+
+    def drain(self):
+        """Take the contents of the buffer as bytes without writing them.
+        """
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        self._writes = 0
+        return data
+
     def flush(self):
         """Flush the buffer to the terminal.
+        Inside a frame, output is held until the frame ends.
+        """
+        if self._frame_depth > 0:
+            return
+        if self._metrics is None:
+            self._write_out(self.drain())
+            return
+        writes = self._writes
+        data = self.drain()
+        start = time.perf_counter()
+        self._write_out(data)
+        self._report_flush(data, writes, time.perf_counter() - start)
+
+    def _write_out(self, data):
+        """Send encoded output to the terminal.
+        Writes go straight to the file descriptor, retrying partial writes
+        and waiting while a non-blocking descriptor is full.
         """
-        print("".join(self._buffer), end="", file=self.out_file, flush=True)
-        self._buffer = []
+        if not data:
+            return
+        fd = self._out_fd
+        if fd is None:
+            self.out_file.write(data.decode(self._encoding, "replace"))
+            self.out_file.flush()
+            return
+        # anything printed through the file object goes first
+        self.out_file.flush()
+        view = memoryview(data)
+        chunk = self.chunk_size or len(view)
+        while view:
+            try:
+                n = os.write(fd, view[:chunk])
+            except BlockingIOError:
+                select.select([], [fd], [])
+                continue
+            except InterruptedError:
+                continue
+            view = view[n:]
+
+    def frame_begin(self):
+        """Start a frame. Output is not flushed until the matching
+        frame_end(), so that the frame reaches the terminal in one write.
+        Frames may be nested.
+        """
+        self._frame_depth += 1
+
+    def frame_end(self, flush=True):
+        """End a frame started with frame_begin() and flush it.
+        """
+        self._frame_depth = max(0, self._frame_depth - 1)
+        if self._frame_depth > 0 or not flush:
+            return
+        chunk_size = self.chunk_size
+        self.chunk_size = None
+        try:
+            self.flush()
+        finally:
+            self.chunk_size = chunk_size
+
+    def probe_sync_output(self, timeout=0.2):
+        """Ask the terminal whether it supports synchronized output.
+        Returns True, False, or None if that can't be determined.
+        """
+        return self._sync_output
+
+    def set_metrics(self, sink):
+        """Report every flush to sink, a callable that takes a
+        pytermfx.metrics.FlushRecord. Pass None to stop.
+        """
+        self._metrics = sink
+
+    def _report_flush(self, data, writes, duration):
+        if self._metrics is not None and data:
+            self._metrics(FlushRecord.measure(
+                data.decode(self._encoding, "replace"), writes, duration))
 
     def clear(self):
         """Clear the screen.
@@ -139,6 +284,11 @@ class BaseAdaptor:
         """
         return NotImplemented
 
+    def get_color_mode(self):
+        """Retrieve the color mode of the terminal.
+        """
+        return self._color_mode
+
     def style(self, *styles):
         """Apply styles, which may be a Color or something with .ansi()
         Accepts a Color or a Style.
@@ -0,0 +1,52 @@
+from pytermfx.adaptors.vt100 import VT100Adaptor
+from collections import deque
+import io
+
+class HeadlessAdaptor(VT100Adaptor):
+    """An adaptor that is not connected to a terminal.
+    Output goes to output_file (a new StringIO by default), the size is
+    fixed, and input comes only from feed_input(). Useful for tests and
+    benchmarks:
+        Terminal(None, None, adaptor=partial(HeadlessAdaptor, size=(120, 40)))
+    """
+    def __init__(self, input_file=None, output_file=None,
+                 resize_handler=lambda: None, size=(80, 24)):
+        if output_file is None:
+            output_file = io.StringIO()
+        super().__init__(input_file, output_file, resize_handler)
+        self._size = tuple(size)
+        self._input = deque()
+
+    def set_cbreak(self, cbreak):
+        self._cbreak = cbreak
+
+    def get_size(self, defaults=None):
+        return self._size
+
+    def set_size(self, w, h):
+        """Pretend that the terminal was resized.
+        """
+        self._size = (w, h)
+        self._cursor = None
+        self.resize_handler()
+
+    def feed_input(self, s):
+        """Queue input, as if it had been typed into the terminal.
+        """
+        self._input.append(s)
+
+    def input_ready(self):
+        return len(self._input) > 0
+
+    def getch_raw(self):
+        if not self._input:
+            raise EOFError("No more input.")
+        return self._input.popleft()
+
+    def cursor_get_pos(self):
+        if self._cursor is None:
+            raise RuntimeError("Cursor position is unknown.")
+        return self._cursor
+
+    def _write_out(self, data):
+        self.out_file.write(data.decode(self._encoding, "replace"))
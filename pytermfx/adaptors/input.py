@@ -1,9 +1,16 @@
 from pytermfx.adaptors.base import BaseAdaptor
+from pytermfx.constants import *
+from pytermfx.escapes import escape_end
 from functools import partial
 from threading import Thread, Event
 from multiprocessing import Queue
 from time import process_time
+from collections import deque
+import codecs
+import os
 import queue
+import selectors
+import time
 
 class InputDaemon:
     def __init__(self, read_ch_func):
@@ -92,4 +99,100 @@ class InputAdaptor:
         self._input = InputDaemon(read_func)
     
     def getch_raw(self):
-        return self._input.read()
\ No newline at end of file
+        return self._input.read()
+
+class InputReader:
+    """Reads input from a file descriptor on the calling thread.
+    Each read takes everything that is available with a single os.read(),
+    then splits it into groups: one per character or complete escape
+    sequence. Only an incomplete escape sequence at the end of the input
+    waits (up to escape_timeout seconds) for more bytes.
+    """
+    def __init__(self, fd, escape_timeout=0.025):
+        self.fd = fd
+        self.escape_timeout = escape_timeout
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(fd, selectors.EVENT_READ)
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._pending = ""
+        self._groups = deque()
+        self.eof = False
+
+    def _fill(self, timeout):
+        """Wait up to timeout seconds for input and read all of it.
+        Returns whether anything was read.
+        """
+        if not self._selector.select(timeout):
+            return False
+        data = os.read(self.fd, 4096)
+        if not data:
+            self.eof = True
+            return False
+        self._pending += self._decoder.decode(data)
+        return True
+
+    def _split(self, final):
+        """Move complete groups from the pending input to the group queue.
+        If final is set, an incomplete escape sequence is also moved.
+        """
+        s = self._pending
+        n = len(s)
+        i = 0
+        while i < n:
+            if s[i] != ESC:
+                self._groups.append(s[i])
+                i += 1
+                continue
+            end = escape_end(s, i)
+            if end is None:
+                if not final:
+                    break
+                end = n
+            self._groups.append(s[i:end])
+            i = end
+        self._pending = s[i:]
+
+    def ready(self):
+        """Check whether a group can be read without blocking.
+        """
+        if not self._groups:
+            self._fill(0)
+            self._split(False)
+        return len(self._groups) > 0
+
+    def read(self, timeout=None):
+        """Get the next group of input.
+        Blocks until input is available, or returns "" after timeout seconds.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._groups:
+            if self._pending:
+                self._split(False)
+                if self._groups:
+                    break
+                # wait a little for the rest of an escape sequence
+                if not self._fill(self.escape_timeout):
+                    self._split(True)
+                continue
+            if self.eof:
+                return ""
+            remaining = None
+            if deadline is not None:
+                remaining = max(0, deadline - time.monotonic())
+            if not self._fill(remaining):
+                if deadline is not None and time.monotonic() >= deadline:
+                    return ""
+        return self._groups.popleft()
+
+class FdInputAdaptor:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._input = InputReader(self.in_file.fileno())
+
+    def getch_raw(self):
+        if not self._cbreak:
+            raise ValueError("Must be in cbreak mode.")
+        return self._input.read()
+
+    def input_ready(self):
+        return self._input.ready()
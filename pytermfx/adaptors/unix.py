@@ -1,19 +1,26 @@
 from pytermfx.constants import *
 from pytermfx.adaptors.base import BaseAdaptor
-from pytermfx.adaptors.input import InputAdaptor
+from pytermfx.adaptors.input import FdInputAdaptor
 from pytermfx.adaptors.vt100 import VT100Adaptor
+from pytermfx.escapes import parse_escape
 from threading import Lock
 import signal
 import termios
 import tty
 import time
+import os
 import re
 
-class UnixAdaptor(InputAdaptor, VT100Adaptor):
+_CURSOR_REPLY = re.compile(r"\x1b\[(\d+);(\d+)R")
+# a DECRQM report for mode 2026, or a DA1 report
+_PROBE_REPLY = re.compile(r"\x1b\[\?(?:2026;(\d+)\$y|[\d;]*c)")
+
+class UnixAdaptor(FdInputAdaptor, VT100Adaptor):
     def __init__(self, input_file, output_file, resize_handler=lambda: None):
-        super().__init__(input_file, output_file, resize_handler, read_func = self.readch)
+        super().__init__(input_file, output_file, resize_handler)
 
         self._original_attr = termios.tcgetattr(self.in_file)
+        self._late_replies = 0  # probes whose replies timed out
 
         size_lock = Lock()
         def handler(s=None, f=None):
@@ -21,6 +28,9 @@ class UnixAdaptor(InputAdaptor, VT100Adaptor):
             time.sleep(0.01)
             size_lock.acquire()
             try:
+                # the terminal may have moved the cursor while reflowing
+                self._cursor = None
+                self._size = None
                 resize_handler()
             finally:
                 size_lock.release()
@@ -35,15 +45,26 @@ class UnixAdaptor(InputAdaptor, VT100Adaptor):
             tty.setcbreak(self.in_file.fileno())
         self._cbreak = cbreak
     
-    def readch(self):
-        if not self._cbreak:
-            raise ValueError("Must be in cbreak mode.")
-        return self.in_file.read(1)
-    
     def get_size(self, defaults=None):
         """Retrieve the dimensions of the terminal window.
+        The size is cached until the terminal reports a resize (SIGWINCH).
+        It is read with the TIOCGWINSZ ioctl when possible, and otherwise
+        by moving the cursor to the bottom right corner and asking the
+        terminal where it ended up.
         Raises an exception if no size detection method works.
         """
+        if self._size is not None:
+            return self._size
+
+        for f in (self.out_file, self.in_file):
+            try:
+                w, h = os.get_terminal_size(f.fileno())
+            except (AttributeError, ValueError, OSError):
+                continue
+            if w > 0 and h > 0:
+                self._size = (w, h)
+                return self._size
+
         def f():
             self.cursor_save()
             self.cursor_to(9999, 9999)
@@ -54,26 +75,109 @@ class UnixAdaptor(InputAdaptor, VT100Adaptor):
             return (w, h)
         tries = 0
         while tries < 3:
+            tries += 1
             try:
-                return f()
+                self._size = f()
+                return self._size
             except:
                 pass
         raise RuntimeError("Failed to get terminal size.")
     
-    def cursor_get_pos(self):
+    def cursor_get_pos(self, timeout=1.0):
+        """Ask the terminal where the cursor is (DSR).
+        Input that arrives before the reply is kept for getch().
+        """
         old_status = self._cbreak
         if not self._cbreak:
             self.set_cbreak(True)
-        termios.tcflush(self.in_file, termios.TCIOFLUSH)
         
         # write DSR (device status report)
-        self.write(CSI, "6n")
+        self._emit(CSI, "6n")
         self.flush()
 
         # read result from stdin
-        status = self.getch_raw()
-        match = re.match(r"\x1b\[(\d+);(\d+)R", status)
+        try:
+            match = self._read_reply(_CURSOR_REPLY, time.monotonic() + timeout)
+        finally:
+            if not old_status:
+                self.set_cbreak(False)
         if not match:
-            raise RuntimeError("Failed to parse size response: " + status)
+            raise RuntimeError("No response to cursor position request.")
+
+        self._cursor = (int(match.group(2)) - 1, int(match.group(1)) - 1)
+        return self._cursor
+
+    def _read_reply(self, pattern, deadline):
+        """Read input until a group matches pattern, a compiled regular
+        expression, and return the match, or None once deadline (a
+        time.monotonic() value) passes. Other input, including keys that
+        were read earlier but not yet taken, is kept for getch().
+        """
+        while True:
+            group = self._input.read(max(0, deadline - time.monotonic()))
+            if group == "":
+                return None
+            match = pattern.match(group)
+            if match:
+                return match
+            self._getch_buffer += parse_escape(group)
+
+    def probe_sync_output(self, timeout=0.2):
+        """Ask the terminal whether it supports synchronized output (DEC
+        mode 2026) with a DECRQM request. A primary device attributes (DA1)
+        request follows it, so that terminals which don't answer DECRQM are
+        detected without waiting for the whole timeout. If neither reply
+        arrives in time, support is unknown (None), and replies that arrive
+        later are dropped instead of being read as keys.
+        Input that arrives meanwhile is kept for getch().
+        """
+        old_status = self._cbreak
+        if not self._cbreak:
+            self.set_cbreak(True)
+        self._emit(CSI, "?2026$p")
+        self._emit(CSI, "c")
+        self.flush()
+
+        supported = None
+        deadline = time.monotonic() + timeout
+        try:
+            while True:
+                match = self._read_reply(_PROBE_REPLY, deadline)
+                if match is None:
+                    # the replies may still come
+                    self._late_replies += 1
+                    break
+                if match.group(1) is None:
+                    # DA1 is answered last
+                    if supported is None:
+                        supported = False
+                    break
+                # 1 (set), 2 (reset), 3 (permanently set) mean supported;
+                # 0 (unknown mode) and 4 (permanently reset) don't
+                supported = match.group(1) in ("1", "2", "3")
+        finally:
+            if not old_status:
+                self.set_cbreak(False)
+        self._sync_output = supported
+        return supported
+
+    def getch_raw(self):
+        while True:
+            group = FdInputAdaptor.getch_raw(self)
+            if not self._drop_late_reply(group):
+                return group
+
+    def input_ready(self):
+        while FdInputAdaptor.input_ready(self):
+            if not self._drop_late_reply(self._input._groups[0]):
+                return True
+            self._input._groups.popleft()
+        return False
 
-        return (int(match.group(2)) - 1, int(match.group(1)) - 1)
\ No newline at end of file
+    def _drop_late_reply(self, group):
+        # whether group is a reply to a probe that timed out
+        if not self._late_replies or not _PROBE_REPLY.match(group):
+            return False
+        if group.endswith("c"):
+            self._late_replies -= 1
+        return True
@@ -0,0 +1,472 @@
+from pytermfx.adaptors.headless import HeadlessAdaptor
+from pytermfx.constants import *
+from pytermfx.width import cells
+import re
+
+# pen of a cell: (fg, bg, attrs). Colors are None (default), a palette index
+# (0-255) or an (r, g, b) tuple; attrs is a frozenset of SGR attribute codes.
+DEFAULT_PEN = (None, None, frozenset())
+
+# one token: a CSI sequence, another escape, a control character or text
+_TOKEN_RE = re.compile(
+    r"\x1b\[([0-?]*)[ -/]*([@-~])"
+    r"|\x1b([^\[])"
+    r"|([\x00-\x1a\x1c-\x1f])"
+    r"|([^\x00-\x1f]+)")
+# an escape sequence that was cut off at the end of the input
+_PARTIAL_RE = re.compile(r"\x1b(\[[0-?]*[ -/]*)?$")
+
+class Snapshot:
+    """An immutable copy of a VirtualScreen.
+    Snapshots compare equal when every cell and the cursor are the same.
+    """
+    __slots__ = ("w", "h", "chars", "pens", "cursor")
+
+    def __init__(self, w, h, chars, pens, cursor):
+        self.w = w
+        self.h = h
+        self.chars = chars   # tuple of one tuple of cell strings per row
+        self.pens = pens     # tuple of one tuple of pens per row
+        self.cursor = cursor
+
+    def __eq__(self, other):
+        return (isinstance(other, Snapshot) and self.chars == other.chars and
+                self.pens == other.pens and self.cursor == other.cursor)
+
+    def __hash__(self):
+        return hash((self.chars, self.pens, self.cursor))
+
+    def __repr__(self):
+        return "Snapshot({}x{}, cursor={})".format(self.w, self.h, self.cursor)
+
+    def cell(self, x, y):
+        """Retrieve the (ch, fg, bg, attrs) of a cell.
+        """
+        return (self.chars[y][x],) + self.pens[y][x]
+
+    def text(self):
+        """Get the characters on screen, one line per row.
+        """
+        return "\n".join("".join(row) for row in self.chars)
+
+    def diff(self, other):
+        """List the (x, y) positions of the cells that differ from another
+        snapshot of the same size.
+        """
+        cells = []
+        for y in range(self.h):
+            if (self.chars[y] == other.chars[y] and
+                self.pens[y] == other.pens[y]):
+                continue
+            a_chars, b_chars = self.chars[y], other.chars[y]
+            a_pens, b_pens = self.pens[y], other.pens[y]
+            cells += ((x, y) for x in range(self.w)
+                      if a_chars[x] != b_chars[x] or a_pens[x] != b_pens[x])
+        return cells
+
+class VirtualScreen:
+    """A model of a VT100/xterm screen that interprets terminal output.
+    Supports the cursor motion, erasing, scrolling and SGR sequences sent by
+    VT100Adaptor, with auto-wrap and LF output processing (LF acts as CR LF,
+    like a tty does by default). Other sequences are ignored.
+    """
+    def __init__(self, w=80, h=24):
+        self.w = w
+        self.h = h
+        self.reset()
+
+    def reset(self):
+        """Clear the screen and restore the initial state.
+        """
+        self._chars = [[" "] * self.w for _ in range(self.h)]
+        self._pens = [[DEFAULT_PEN] * self.w for _ in range(self.h)]
+        self.x = 0
+        self.y = 0
+        self.pen = DEFAULT_PEN
+        self.cursor_visible = True
+        self.modes = set()   # private modes that are set, like "?1006"
+        self._wrap = False   # the last column was written; wrap before next
+        self._saved = (0, 0, DEFAULT_PEN)
+        self._tail = ""
+        self._pen_cache = {}
+
+    def resize(self, w, h):
+        """Change the size, keeping the top left part of the screen.
+        """
+        for rows in (self._chars, self._pens):
+            fill = " " if rows is self._chars else DEFAULT_PEN
+            del rows[h:]
+            for row in rows:
+                del row[w:]
+                row += [fill] * (w - len(row))
+            rows += [[fill] * w for _ in range(h - len(rows))]
+        self.w = w
+        self.h = h
+        self.x = min(self.x, w - 1)
+        self.y = min(self.y, h - 1)
+        self._wrap = False
+
+    @property
+    def cursor(self):
+        return (self.x, self.y)
+
+    def cell(self, x, y):
+        """Retrieve the (ch, fg, bg, attrs) of a cell.
+        """
+        return (self._chars[y][x],) + self._pens[y][x]
+
+    def line(self, y):
+        return "".join(self._chars[y])
+
+    def text(self):
+        """Get the characters on screen, one line per row.
+        """
+        return "\n".join("".join(row) for row in self._chars)
+
+    def snapshot(self):
+        return Snapshot(self.w, self.h,
+                        tuple(tuple(row) for row in self._chars),
+                        tuple(tuple(row) for row in self._pens),
+                        (self.x, self.y))
+
+    def feed(self, s):
+        """Interpret terminal output.
+        An escape sequence cut off at the end is kept for the next call.
+        """
+        if self._tail:
+            s = self._tail + s
+            self._tail = ""
+        partial = _PARTIAL_RE.search(s)
+        if partial:
+            self._tail = s[partial.start():]
+            s = s[:partial.start()]
+        for params, final, esc, control, text in _TOKEN_RE.findall(s):
+            if text:
+                self._text(text)
+            elif final:
+                self._csi(params, final)
+            elif control:
+                self._control(control)
+            elif esc:
+                self._esc(esc)
+        return self
+
+    def _text(self, text):
+        if not text.isascii():
+            return self._text_cells(text)
+        w = self.w
+        pen = self.pen
+        while text:
+            if self._wrap:
+                self._wrap = False
+                self.x = 0
+                self._index()
+            x = self.x
+            n = min(len(text), w - x)
+            row = self._chars[self.y]
+            # overwriting half of a wide character erases the other half
+            if row[x] == "" and x > 0:
+                row[x - 1] = " "
+            if x + n < w and row[x + n] == "":
+                row[x + n] = " "
+            row[x:x + n] = text[:n]
+            self._pens[self.y][x:x + n] = [pen] * n
+            text = text[n:]
+            if x + n >= w:
+                self.x = w - 1
+                self._wrap = True
+            else:
+                self.x = x + n
+
+    def _text_cells(self, text):
+        # wide characters take two cells: the character, then an empty
+        # string. Zero width characters join the cell before them.
+        w = self.w
+        pen = self.pen
+        for g, gw in cells(text):
+            if gw == 0:
+                x = self.x if self._wrap else self.x - 1
+                if x >= 0:
+                    self._chars[self.y][x] += g
+                continue
+            if gw > w:
+                continue
+            if self._wrap or self.x + gw > w:
+                if not self._wrap:
+                    # a wide character that doesn't fit goes on the next line
+                    self._chars[self.y][self.x:] = [" "] * (w - self.x)
+                self._wrap = False
+                self.x = 0
+                self._index()
+            x = self.x
+            row = self._chars[self.y]
+            if row[x] == "" and x > 0:
+                row[x - 1] = " "
+            if x + gw < w and row[x + gw] == "":
+                row[x + gw] = " "
+            row[x:x + gw] = [g] + [""] * (gw - 1)
+            self._pens[self.y][x:x + gw] = [pen] * gw
+            if x + gw >= w:
+                self.x = w - 1
+                self._wrap = True
+            else:
+                self.x = x + gw
+
+    def _index(self):
+        """Move down a line, scrolling at the bottom.
+        """
+        if self.y < self.h - 1:
+            self.y += 1
+        else:
+            self._scroll_up(1)
+
+    def _scroll_up(self, n):
+        n = min(n, self.h)
+        del self._chars[:n]
+        del self._pens[:n]
+        self._chars += [[" "] * self.w for _ in range(n)]
+        self._pens += [[self._blank_pen()] * self.w for _ in range(n)]
+
+    def _scroll_down(self, n):
+        n = min(n, self.h)
+        del self._chars[self.h - n:]
+        del self._pens[self.h - n:]
+        self._chars[:0] = [[" "] * self.w for _ in range(n)]
+        self._pens[:0] = [[self._blank_pen()] * self.w for _ in range(n)]
+
+    def _blank_pen(self):
+        # erased cells keep the current background color
+        bg = self.pen[1]
+        return DEFAULT_PEN if bg is None else (None, bg, frozenset())
+
+    def _erase(self, y, x0, x1):
+        self._chars[y][x0:x1] = [" "] * (x1 - x0)
+        self._pens[y][x0:x1] = [self._blank_pen()] * (x1 - x0)
+
+    def _control(self, ch):
+        if ch == "\n":
+            self.x = 0
+            self._wrap = False
+            self._index()
+        elif ch == "\r":
+            self.x = 0
+            self._wrap = False
+        elif ch == "\b":
+            self.x = max(0, self.x - 1)
+            self._wrap = False
+        elif ch == "\t":
+            self.x = min(self.w - 1, (self.x // 8 + 1) * 8)
+            self._wrap = False
+
+    def _esc(self, ch):
+        if ch == "7":
+            self._save()
+        elif ch == "8":
+            self._restore()
+        elif ch == "M":
+            # reverse index
+            if self.y > 0:
+                self.y -= 1
+            else:
+                self._scroll_down(1)
+        elif ch == "D":
+            self._index()
+        elif ch == "E":
+            self.x = 0
+            self._index()
+        elif ch == "c":
+            self.reset()
+            return
+        self._wrap = False
+
+    def _save(self):
+        self._saved = (self.x, self.y, self.pen)
+
+    def _restore(self):
+        self.x, self.y, self.pen = self._saved
+        self.x = min(self.x, self.w - 1)
+        self.y = min(self.y, self.h - 1)
+
+    def _csi(self, params, final):
+        if final == "m":
+            self._sgr(params)
+            return
+        if params.startswith("?"):
+            if final in "hl":
+                for mode in params[1:].split(";"):
+                    if mode == "25":
+                        self.cursor_visible = final == "h"
+                    elif final == "h":
+                        self.modes.add("?" + mode)
+                    else:
+                        self.modes.discard("?" + mode)
+            return
+
+        args = [int(p) if p.isdigit() else 0 for p in params.split(";")]
+        n = args[0] or 1
+        w, h = self.w, self.h
+        self._wrap = False
+        if final == "H" or final == "f":
+            row = args[0] or 1
+            col = (args[1] if len(args) > 1 else 0) or 1
+            self.x = min(col, w) - 1
+            self.y = min(row, h) - 1
+        elif final == "A":
+            self.y = max(0, self.y - n)
+        elif final == "B":
+            self.y = min(h - 1, self.y + n)
+        elif final == "C":
+            self.x = min(w - 1, self.x + n)
+        elif final == "D":
+            self.x = max(0, self.x - n)
+        elif final == "E":
+            self.x = 0
+            self.y = min(h - 1, self.y + n)
+        elif final == "F":
+            self.x = 0
+            self.y = max(0, self.y - n)
+        elif final == "G" or final == "`":
+            self.x = min(n, w) - 1
+        elif final == "d":
+            self.y = min(n, h) - 1
+        elif final == "J":
+            mode = args[0]
+            if mode == 0:
+                self._erase(self.y, self.x, w)
+                for y in range(self.y + 1, h):
+                    self._erase(y, 0, w)
+            elif mode == 1:
+                for y in range(self.y):
+                    self._erase(y, 0, w)
+                self._erase(self.y, 0, self.x + 1)
+            elif mode in (2, 3):
+                for y in range(h):
+                    self._erase(y, 0, w)
+        elif final == "K":
+            mode = args[0]
+            if mode == 0:
+                self._erase(self.y, self.x, w)
+            elif mode == 1:
+                self._erase(self.y, 0, self.x + 1)
+            elif mode == 2:
+                self._erase(self.y, 0, w)
+        elif final == "X":
+            self._erase(self.y, self.x, min(w, self.x + n))
+        elif final == "P":
+            n = min(n, w - self.x)
+            for rows, fill in ((self._chars, " "), (self._pens, self._blank_pen())):
+                row = rows[self.y]
+                del row[self.x:self.x + n]
+                row += [fill] * n
+        elif final == "@":
+            n = min(n, w - self.x)
+            for rows, fill in ((self._chars, " "), (self._pens, self._blank_pen())):
+                row = rows[self.y]
+                row[self.x:self.x] = [fill] * n
+                del row[w:]
+        elif final == "S":
+            self._scroll_up(n)
+        elif final == "T":
+            self._scroll_down(n)
+        elif final == "s":
+            self._save()
+        elif final == "u":
+            self._restore()
+
+    def _sgr(self, params):
+        pen = self._pen_cache.get((self.pen, params))
+        if pen is not None:
+            self.pen = pen
+            return
+        key = (self.pen, params)
+        fg, bg, attrs = self.pen
+        attrs = set(attrs)
+        args = [int(p) if p.isdigit() else 0 for p in params.split(";")]
+        i = 0
+        while i < len(args):
+            a = args[i]
+            if a == 0:
+                fg, bg = None, None
+                attrs.clear()
+            elif 30 <= a <= 37:
+                fg = a - 30
+            elif 90 <= a <= 97:
+                fg = a - 90 + 8
+            elif 40 <= a <= 47:
+                bg = a - 40
+            elif 100 <= a <= 107:
+                bg = a - 100 + 8
+            elif a == 39:
+                fg = None
+            elif a == 49:
+                bg = None
+            elif a in (38, 48):
+                color = None
+                if i + 1 < len(args):
+                    if args[i + 1] == 5 and i + 2 < len(args):
+                        color = args[i + 2]
+                        i += 2
+                    elif args[i + 1] == 2 and i + 4 < len(args):
+                        color = tuple(args[i + 2:i + 5])
+                        i += 4
+                if a == 38:
+                    fg = color
+                else:
+                    bg = color
+            elif a == 22:
+                attrs.discard(1)
+                attrs.discard(2)
+            elif a == 23:
+                attrs.discard(3)
+            elif a == 24:
+                attrs.discard(4)
+            elif a == 25:
+                attrs.discard(5)
+                attrs.discard(6)
+            elif a == 27:
+                attrs.discard(7)
+            elif a == 28:
+                attrs.discard(8)
+            elif a == 29:
+                attrs.discard(9)
+            else:
+                attrs.add(a)
+            i += 1
+        pen = (fg, bg, frozenset(attrs))
+        if len(self._pen_cache) > 4096:
+            self._pen_cache.clear()
+        self._pen_cache[key] = pen
+        self.pen = pen
+
+class VirtualAdaptor(HeadlessAdaptor):
+    """A headless adaptor whose output is interpreted by a VirtualScreen
+    (available as adaptor.screen) instead of being stored as text.
+    Use it to render apps without a terminal and to check what ends up on
+    screen:
+        t = Terminal(None, None, adaptor=VirtualAdaptor)
+        t.write("hi").flush()
+        t.adaptor.screen.line(0)  # "hi" followed by spaces
+    Cursor position reports come from the screen.
+    """
+    def __init__(self, input_file=None, output_file=None,
+                 resize_handler=lambda: None, size=(80, 24)):
+        super().__init__(input_file, output_file, resize_handler, size)
+        self.screen = VirtualScreen(*self._size)
+
+    def set_size(self, w, h):
+        self.screen.resize(w, h)
+        super().set_size(w, h)
+
+    def cursor_get_pos(self):
+        self.flush()
+        self._cursor = self.screen.cursor
+        return self._cursor
+
+    def snapshot(self):
+        """Flush and take a Snapshot of the screen.
+        """
+        self.flush()
+        return self.screen.snapshot()
+
+    def _write_out(self, data):
+        self.screen.feed(data.decode(self._encoding, "replace"))
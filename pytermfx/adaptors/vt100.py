@@ -1,6 +1,77 @@
 from pytermfx.adaptors.base import BaseAdaptor
 from pytermfx.constants import *
 from pytermfx.color import ColorMode, Color
+from pytermfx.style import Style, NoneStyle
+from pytermfx.width import width
+import re
+
+# splits text into control characters and runs of other characters
+_CONTROL_RE = re.compile(r"([\x00-\x1f\x7f])")
+
+# pen state: (fg params, bg params, set of SGR attributes)
+DEFAULT_PEN = (None, None, frozenset())
+
+def _cursor_path_x(x0, x1):
+    """Find the shortest sequence that moves the cursor from column x0 to
+    column x1 on the same line.
+    """
+    if x1 == x0:
+        return ""
+    if x1 == 0:
+        return "\r"
+    if x1 > x0:
+        n = x1 - x0
+        options = [CSI + (str(n) if n > 1 else "") + "C"]
+    else:
+        n = x0 - x1
+        options = [
+            "\b" * n,
+            CSI + (str(n) if n > 1 else "") + "D",
+            "\r" + _cursor_path_x(0, x1)]
+    options.append(CSI + str(x1 + 1) + "G")
+    return min(options, key=len)
+
+def _cursor_path(cursor, x, y):
+    """Find the shortest sequence that moves the cursor to (x, y).
+    cursor is the current (x, y) position or None if it is unknown.
+    """
+    cup = CSI + (str(y + 1) + ";" + str(x + 1) if x or y else "") + "H"
+    if cursor is None:
+        return cup
+    cx, cy = cursor
+    if cy == y:
+        options = [_cursor_path_x(cx, x)]
+    elif y > cy:
+        n = y - cy
+        options = [
+            "\r" + "\n" * n + _cursor_path_x(0, x),
+            CSI + (str(n) if n > 1 else "") + "B" + _cursor_path_x(cx, x)]
+    else:
+        n = cy - y
+        options = [CSI + (str(n) if n > 1 else "") + "A" + _cursor_path_x(cx, x)]
+        if n == 1:
+            options.append(ESC + "M" + _cursor_path_x(cx, x))
+    options.append(cup)
+    return min(options, key=len)
+
+def _sgr(pen, target):
+    """Build the SGR sequence that changes the pen state from pen (None if
+    unknown) to target.
+    """
+    fg, bg, attrs = target
+    params = []
+    if pen is None or not pen[2] <= attrs:
+        # attributes can only be removed by a reset
+        params.append("0")
+        old_fg, old_bg, old_attrs = DEFAULT_PEN
+    else:
+        old_fg, old_bg, old_attrs = pen
+    params += (str(a) for a in sorted(attrs - old_attrs))
+    if fg != old_fg:
+        params.append(fg or "39")
+    if bg != old_bg:
+        params.append(bg or "49")
+    return CSI + ";".join(params) + "m"
 
 class VT100Adaptor(BaseAdaptor):
     def __init__(self, input_file, output_file, resize_handler=lambda: None):
@@ -8,9 +79,105 @@ class VT100Adaptor(BaseAdaptor):
         self._color_mode = ColorMode.MODE_256
         self._cursor_visible = False
         self._mouse = None
+        self._pen = None       # SGR state of the terminal; None if unknown
+        self._pen_next = None  # SGR state requested by style(); None if same
+        self._cursor = None        # tracked (x, y) position; None if unknown
+        self._cursor_saved = None
+    
+    def _emit(self, *things):
+        """Write control sequences to the buffer.
+        Unlike write(), this does not apply pending styles first.
+        """
+        BaseAdaptor.write(self, *things)
+
+    def write(self, *things):
+        """Write an arbitrary number of things to the buffer.
+        """
+        if self._pen_next is not None:
+            self._pen_sync()
+        if len(things) == 1 and type(things[0]) is str:
+            text = things[0]
+        else:
+            text = "".join(map(str, things))
+        self._buffer += text.encode(self._encoding, "replace")
+        self._writes += 1
+        if self._cursor is None:
+            return
+        if text.isprintable():
+            # fast path: no control or format characters
+            x = self._cursor[0] + (len(text) if text.isascii() else width(text))
+            if self._size and x >= self._size[0]:
+                self._cursor = None
+            else:
+                self._cursor = (x, self._cursor[1])
+        else:
+            self._cursor_track(text)
+
+    def _cursor_track(self, text):
+        """Update the tracked cursor position after writing text that
+        contains control or format characters.
+        """
+        if ESC in text:
+            self._cursor = None
+            return
+        x, y = self._cursor
+        w, h = self._size or (None, None)
+        for k, ch in enumerate(_CONTROL_RE.split(text)):
+            if k % 2 == 0:
+                # a run of text between control characters
+                x += width(ch)
+                if w and x >= w:
+                    self._cursor = None
+                    return
+            elif ch == "\n":
+                # output processing turns LF into CR LF
+                x = 0
+                y += 1
+                if h and y >= h:
+                    y = h - 1
+            elif ch == "\r":
+                x = 0
+            elif ch == "\b":
+                x = max(0, x - 1)
+            elif ch == "\t":
+                x = (x // 8 + 1) * 8
+                if w:
+                    x = min(x, w - 1)
+            else:
+                self._cursor = None
+                return
+        self._cursor = (x, y)
+
+    def drain(self):
+        """Take the contents of the buffer, including any pending style
+        change, without writing them.
+        """
+        if self._pen_next is not None:
+            self._pen_sync()
+        return BaseAdaptor.drain(self)
     
-    def mouse_enable(self, mode = "move"):
+    def frame_begin(self):
+        """Start a frame. The terminal is asked to hold off drawing until
+        the frame ends (synchronized output, DEC mode 2026) unless it is known
+        not to support it. Terminals without support ignore the request.
+        """
+        if self._frame_depth == 0 and self._sync_output is not False:
+            self._emit(CSI, "?2026h")
+        BaseAdaptor.frame_begin(self)
+
+    def frame_end(self, flush=True):
+        if self._frame_depth == 1 and self._sync_output is not False:
+            self._emit(CSI, "?2026l")
+        BaseAdaptor.frame_end(self, flush)
+
+    def mouse_enable(self, mode = "move", protocol = "sgr", coalesce = True,
+                     history = False):
         """Enable experimental mouse support.
+        mode     - "click", "drag" or "move": which events are reported
+        protocol - "sgr" (1006), "pixel" (1016, positions are in pixels) or
+                   "utf8" (1005, limited to about 2000 columns)
+        coalesce - collapse motion events that arrive together into one
+        history  - keep the skipped positions in MouseEvent.history
         """
         if not self._cbreak:
             raise ValueError("Must be in cbreak mode.")
@@ -18,10 +185,19 @@ class VT100Adaptor(BaseAdaptor):
             "click": "?1001h",
             "drag":  "?1002h",
             "move":  "?1003h"}
+        PROTOCOL_MAP = {
+            "sgr":   "?1006h",
+            "pixel": "?1016h",
+            "utf8":  "?1005h"}
         assert(mode in MODE_MAP)
+        assert(protocol in PROTOCOL_MAP)
         self._mouse = mode
-        self.write(CSI, MODE_MAP[mode]) # read movements
-        self.write(CSI, "?1005h") # use UTF-8 encoding
+        self._mouse_coalesce = coalesce
+        self._mouse_history = history
+        self._emit(CSI, MODE_MAP[mode]) # read movements
+        if protocol == "pixel":
+            self._emit(CSI, PROTOCOL_MAP["sgr"]) # fallback if unsupported
+        self._emit(CSI, PROTOCOL_MAP[protocol])
         self.flush()
 
     def mouse_disable(self):
@@ -30,9 +206,12 @@ class VT100Adaptor(BaseAdaptor):
         if not self._mouse:
             return
         # disable mouse
-        self.write(CSI, "?1001l") 
-        self.write(CSI, "?1002l") 
-        self.write(CSI, "?1003l") 
+        self._emit(CSI, "?1001l") 
+        self._emit(CSI, "?1002l") 
+        self._emit(CSI, "?1003l") 
+        self._emit(CSI, "?1005l")
+        self._emit(CSI, "?1006l")
+        self._emit(CSI, "?1016l")
         self.flush()
         self._mouse = None
     
@@ -48,14 +227,17 @@ class VT100Adaptor(BaseAdaptor):
     def clear(self):
         """Clear the screen.
         """
-        self.write(CSI, "2J")
+        self._pen_sync()
+        self._emit(CSI, "2J")
 
     def clear_line(self):
+        self._pen_sync()
         self.cursor_to_start()
-        self.write(CSI, "2K")
+        self._emit(CSI, "2K")
 
     def clear_to_end(self):
-        self.write(CSI, "0K")
+        self._pen_sync()
+        self._emit(CSI, "0K")
 
     def reset(self):
         self.flush()
@@ -67,45 +249,167 @@ class VT100Adaptor(BaseAdaptor):
         # self.write(ESC, "c") # reset state
 
     def cursor_set_visible(self, visible=True):
-        self.write(CSI, "?25", "h" if visible else "l")
+        self._emit(CSI, "?25", "h" if visible else "l")
         self._cursor_visible = visible
 
     def cursor_save(self):
-        self.write(CSI, "s")
+        self._emit(CSI, "s")
+        self._cursor_saved = self._cursor
 
     def cursor_restore(self):
-        self.write(CSI, "u")
+        self._emit(CSI, "u")
+        self._cursor = self._cursor_saved
 
     def cursor_to(self, x, y):
-        self.write(CSI, int(y+1), ";", int(x+1), "H")
+        x = int(x)
+        y = int(y)
+        if self._size and not (0 <= x < self._size[0] and 0 <= y < self._size[1]):
+            # the terminal clamps the position, so we can't track it
+            self._emit(CSI, y+1, ";", x+1, "H")
+            self._cursor = None
+            return
+        self._emit(_cursor_path(self._cursor, x, y))
+        self._cursor = (x, y)
 
     def cursor_to_x(self, x):
-        self.write(CSI, int(x+1), "G")
+        if self._cursor is not None:
+            self.cursor_to(x, self._cursor[1])
+        else:
+            self._emit(CSI, int(x+1), "G")
 
     def cursor_move(self, x, y):
+        if self._cursor is not None:
+            self.cursor_to(self._cursor[0] + x, self._cursor[1] + y)
+            return
         if x < 0:
-            self.write(CSI, abs(int(x)), "D")
+            self._emit(CSI, abs(int(x)), "D")
         elif x > 0:
-            self.write(CSI, int(x), "C")
+            self._emit(CSI, int(x), "C")
         if y < 0:
-            self.write(CSI, abs(int(x)), "A")
+            self._emit(CSI, abs(int(y)), "A")
         elif y > 0:
-            self.write(CSI, int(x), "B")
+            self._emit(CSI, int(y), "B")
 
     def cursor_to_start(self):
-        self.write(CSI, "1G")
+        if self._cursor is not None:
+            self.cursor_to(0, self._cursor[1])
+        else:
+            self._emit(CSI, "1G")
 
     def style(self, *styles):
         """Apply styles, which may be a Color or something with .ansi()
         Accepts a Color or a Style.
+        Styles are not written until they affect output, and only the SGR
+        parameters that differ from the current terminal state are sent.
         """
+        fg, bg, attrs = self._pen_next or self._pen or DEFAULT_PEN
         for style in styles:
             if isinstance(style, Color):
-                self.write(style.to_mode(self._color_mode))
+                # strip CSI and the final "m"
+                params = style.to_mode(self._color_mode)[2:-1]
+                if style._bg:
+                    bg = params
+                else:
+                    fg = params
+            elif isinstance(style, NoneStyle):
+                fg, bg, attrs = DEFAULT_PEN
+            elif isinstance(style, Style):
+                attrs = attrs | style.styles
             else:
-                self.write(style.ansi())
+                # unknown style; write it as-is and forget the pen state
+                self._pen_next = (fg, bg, attrs)
+                self._pen_sync()
+                self._emit(style.ansi())
+                self._pen = None
+                fg, bg, attrs = DEFAULT_PEN
+        self._pen_next = (fg, bg, frozenset(attrs))
+
+    def write_runs(self, runs):
+        """Write runs of text at given positions. runs is an iterable of
+        (x, y, styles, text) tuples, where styles is a tuple of Colors and
+        Styles applied over Style.none. This does what cursor_to(), style()
+        and write() would do for each run, but builds the output in one pass.
+        """
+        out = []
+        append = out.append
+        # the tracked cursor, with cy = -1 if it is unknown
+        cx, cy = self._cursor or (0, -1)
+        pen = self._pen
+        self._pen_next = None
+        w, h = self._size or (0, 0)
+        pens = {}    # id(styles) -> (styles, pen); styles is kept alive
+        sgrs = {}    # (old pen, new pen) -> SGR sequence
+        widths = {}  # text -> width, or None if it can't be tracked
+        for x, y, styles, text in runs:
+            entry = pens.get(id(styles))
+            if entry is None:
+                target = None
+                if all(isinstance(s, (Color, Style)) for s in styles):
+                    # work out the pen with style() and take it back
+                    self._pen_next = DEFAULT_PEN
+                    self.style(*styles)
+                    target = self._pen_next
+                    self._pen_next = None
+                entry = pens[id(styles)] = (styles, target)
+            target = entry[1]
+            n = widths.get(text, -1)
+            if n == -1:
+                n = widths[text] = ((len(text) if text.isascii() else width(text))
+                                    if text.isprintable() else None)
+            if target is None or n is None:
+                # a style or text that can't be tracked here
+                self._write_out_runs(out, cx, cy, pen)
+                out = []
+                append = out.append
+                self.cursor_to(x, y)
+                self.style(Style.none, *styles)
+                self.write(text)
+                cx, cy = self._cursor or (0, -1)
+                pen = self._pen
+                continue
+            if w and not (0 <= x < w and 0 <= y < h):
+                # the terminal clamps the position, so we can't track it
+                append("{}{};{}H".format(CSI, y + 1, x + 1))
+                y = -1
+            elif y != cy:
+                append(_cursor_path((cx, cy) if cy >= 0 else None, x, y))
+            elif x > cx:
+                # forward on the same line, the most common move
+                append(CSI + str(x - cx) + "C" if x - cx > 1 else CSI + "C")
+            elif x < cx:
+                append(_cursor_path((cx, cy), x, y))
+            if target != pen:
+                sgr = sgrs.get((pen, target))
+                if sgr is None:
+                    sgr = sgrs[(pen, target)] = _sgr(pen, target)
+                append(sgr)
+                pen = target
+            append(text)
+            cx = x + n
+            cy = -1 if w and cx >= w else y
+        self._write_out_runs(out, cx, cy, pen)
+
+    def _write_out_runs(self, out, cx, cy, pen):
+        if out:
+            self._buffer += "".join(out).encode(self._encoding, "replace")
+            self._writes += 1
+        self._cursor = (cx, cy) if cy >= 0 else None
+        self._pen = pen
+
+    def _pen_sync(self):
+        """Emit a single SGR sequence that moves the terminal from its
+        current pen state to the requested one.
+        """
+        target = self._pen_next
+        self._pen_next = None
+        if target is None or target == self._pen:
+            return
+        self._emit(_sgr(self._pen, target))
+        self._pen = target
 
     def style_reset(self):
         """Reset style.
         """
-        self.write(CSI, "0m")
\ No newline at end of file
+        self._pen_next = None
+        self._pen = DEFAULT_PEN
+        self._emit(CSI, "0m")
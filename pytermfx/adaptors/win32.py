@@ -111,7 +111,8 @@ class Win10Adaptor(InputAdaptor, VT100Adaptor):
         kernel32.GetConsoleScreenBufferInfo(self.out_file, byref(info))
         w = info.srWindow.Right - info.srWindow.Left
         h = info.srWindow.Bottom - info.srWindow.Top
-        return (w+1, h+1)
+        self._size = (w+1, h+1)
+        return self._size
 
     def readch(self):
         ch = WCHAR()
@@ -125,10 +126,8 @@ class Win10Adaptor(InputAdaptor, VT100Adaptor):
         )
         return ch.value
 
-    def flush(self):
-        """Flush the buffer to the terminal.
-        """
-        msg = "".join(self._buffer)
+    def _write_out(self, data):
+        msg = data.decode(self._encoding, "replace")
         written = c_short()
         kernel32.WriteConsoleW(
             self.out_file,
@@ -137,7 +136,6 @@ class Win10Adaptor(InputAdaptor, VT100Adaptor):
             byref(written),
             None
         )
-        self._buffer = []
 
     def clear(self):
         w, h = self.get_size()
@@ -175,12 +173,18 @@ class Win10Adaptor(InputAdaptor, VT100Adaptor):
         self.flush()
         info = CONSOLE_SCREEN_BUFFER_INFO()
         kernel32.GetConsoleScreenBufferInfo(self.out_file, byref(info))
-        return (info.dwCursorPosition.X, info.dwCursorPosition.Y)
+        self._cursor = (info.dwCursorPosition.X, info.dwCursorPosition.Y)
+        return self._cursor
 
     def cursor_to(self, x, y):
         self.flush()
         pos = COORD(X=x, Y=y)
         kernel32.SetConsoleCursorPosition(self.out_file, pos)
+        self._cursor = (x, y)
+
+    # the cursor is moved through the console API, so runs are written one
+    # at a time
+    write_runs = BaseAdaptor.write_runs
     
     def cursor_move(self, x, y):
         cur_x, cur_y = self.cursor_get_pos()
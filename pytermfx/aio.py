@@ -0,0 +1,313 @@
+"""asyncio support: a Terminal whose input and output run on an event loop.
+Requires a file descriptor based terminal (Unix-like systems).
+"""
+
+from pytermfx.terminal import Terminal
+from pytermfx.escapes import EscapeParser
+from pytermfx.scheduler import FrameScheduler, VARIABLE
+import asyncio
+import codecs
+import inspect
+import os
+import signal
+import time
+
+class AsyncTerminal:
+    """Wraps a Terminal for use from asyncio.
+    Drawing methods are those of the wrapped Terminal and only add to its
+    buffer. Input is read when the loop sees the input file become readable
+    (loop.add_reader), and output is written with await flush(), which waits
+    for the output file to accept more data (loop.add_writer) instead of
+    blocking the loop. The output file is non-blocking while open, so the
+    wrapped Terminal's own flush() should not be used until close().
+    """
+    def __init__(self, terminal=None, escape_timeout=0.025):
+        self.terminal = terminal if terminal is not None else Terminal()
+        self.escape_timeout = escape_timeout
+        self._loop = None
+        self._in_fd = self.terminal.adaptor.in_file.fileno()
+        self._out_fd = self.terminal.adaptor.out_file.fileno()
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._parser = EscapeParser()
+        self._escape_timer = None
+        self._waiter = None
+        self._eof = False
+        self._old_winch = None
+        self._out_blocking = None
+
+    def open(self):
+        """Start reading input on the running event loop.
+        Called automatically by getch() and flush().
+        """
+        if self._loop is not None:
+            return self
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(self._in_fd, self._on_readable)
+        self._out_blocking = os.get_blocking(self._out_fd)
+        os.set_blocking(self._out_fd, False)
+
+        # handle resizes on the loop rather than in the middle of a frame
+        if hasattr(signal, "SIGWINCH"):
+            try:
+                old = signal.getsignal(signal.SIGWINCH)
+                self._loop.add_signal_handler(signal.SIGWINCH, self._on_resize)
+                self._old_winch = old
+            except (NotImplementedError, RuntimeError, ValueError):
+                pass
+        return self
+
+    def __getattr__(self, name):
+        return getattr(self.terminal, name)
+
+    def close(self):
+        """Stop reading input, make the output file blocking again and
+        restore the synchronous resize handler.
+        """
+        if self._loop is None:
+            return
+        self._loop.remove_reader(self._in_fd)
+        os.set_blocking(self._out_fd, self._out_blocking)
+        if self._escape_timer is not None:
+            self._escape_timer.cancel()
+            self._escape_timer = None
+        if self._old_winch is not None:
+            self._loop.remove_signal_handler(signal.SIGWINCH)
+            signal.signal(signal.SIGWINCH, self._old_winch)
+            self._old_winch = None
+        self._loop = None
+
+    async def __aenter__(self):
+        return self.open()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def _on_resize(self):
+        adaptor = self.terminal.adaptor
+        adaptor._cursor = None
+        adaptor._size = None
+        self.terminal._handle_resize()
+
+    def _on_readable(self):
+        try:
+            data = os.read(self._in_fd, 4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        if not data:
+            self._eof = True
+            self._loop.remove_reader(self._in_fd)
+            self._push(self._parser.flush())
+            self._wake()
+            return
+        self._push(self._parser.feed(self._decoder.decode(data)))
+
+        # a lone ESC is the escape key unless the rest of a sequence follows
+        if self._escape_timer is not None:
+            self._escape_timer.cancel()
+            self._escape_timer = None
+        if self._parser.pending():
+            self._escape_timer = self._loop.call_later(
+                self.escape_timeout, self._on_escape_timeout)
+
+    def _on_escape_timeout(self):
+        self._escape_timer = None
+        self._push(self._parser.flush())
+
+    def _push(self, events):
+        if not events:
+            return
+        adaptor = self.terminal.adaptor
+        adaptor._getch_buffer.extend(events)
+        if adaptor._mouse_coalesce:
+            adaptor._coalesce_motion()
+        self._wake()
+
+    def _wake(self):
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    async def getch(self):
+        """Get the next key or mouse event.
+        Waits without blocking the loop. Raises EOFError once the input is
+        closed and everything before it has been read.
+        """
+        self.open()
+        buffer = self.terminal.adaptor._getch_buffer
+        while not buffer:
+            if self._eof:
+                raise EOFError("Terminal input was closed.")
+            self._waiter = self._loop.create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        return buffer.popleft()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await self.getch()
+        except EOFError:
+            raise StopAsyncIteration
+
+    async def flush(self):
+        """Write the buffered output to the terminal.
+        Waits for the output file to accept data instead of blocking.
+        Inside a frame, output is held until the frame ends. If the flush is
+        cancelled, the output not yet written is kept for the next flush.
+        """
+        self.open()
+        adaptor = self.terminal.adaptor
+        if adaptor._frame_depth > 0:
+            # sent when the frame ends
+            return
+        writes = adaptor._writes
+        data = adaptor.drain()
+        adaptor.out_file.flush()
+        start = time.perf_counter()
+        view = memoryview(data)
+        try:
+            while view:
+                view = view[self._write_some(view):]
+                if view:
+                    await self._writable()
+        except asyncio.CancelledError:
+            adaptor._buffer[:0] = view
+            raise
+        adaptor._report_flush(data, writes, time.perf_counter() - start)
+
+    def _write_some(self, data):
+        try:
+            return os.write(self._out_fd, data)
+        except (BlockingIOError, InterruptedError):
+            return 0
+
+    async def _writable(self):
+        future = self._loop.create_future()
+        def ready():
+            if not future.done():
+                future.set_result(None)
+        self._loop.add_writer(self._out_fd, ready)
+        try:
+            await future
+        finally:
+            self._loop.remove_writer(self._out_fd)
+
+class AsyncTerminalApp:
+    """The asyncio counterpart of pytermfx.tools.TerminalApp.
+    Input and frames are both driven by the event loop, so the app shares a
+    single thread with any other tasks on the loop.
+    The client may pass update(), render() and on_input(key) parameters as
+    for TerminalApp; each may also be a coroutine function. Output is flushed
+    after every frame and every input.
+    """
+    def __init__(self, terminal, framerate=0, **kwargs):
+        if not isinstance(terminal, AsyncTerminal):
+            terminal = AsyncTerminal(terminal)
+        self.terminal = terminal
+        self.framerate = framerate
+        self.on_input = kwargs["on_input"] if "on_input" in kwargs else lambda char: None
+        self.update = kwargs["update"] if "update" in kwargs else lambda: None
+        self.render = kwargs["render"] if "render" in kwargs else None
+        self.scheduler = None
+        if framerate > 0:
+            self.scheduler = FrameScheduler(framerate,
+                timestep=kwargs.get("timestep", VARIABLE),
+                budget=kwargs.get("budget"))
+        self._running = False
+        self._tasks = []
+        self.terminal.add_resize_handler(
+            lambda: self._running and asyncio.ensure_future(self._redraw()))
+
+    @property
+    def stats(self):
+        return self.scheduler.stats if self.scheduler is not None else None
+
+    async def _call(self, func, *args):
+        result = func(*args)
+        if inspect.isawaitable(result):
+            await result
+
+    async def _input_loop(self):
+        try:
+            while self._running:
+                key = await self.terminal.getch()
+                await self._call(self.on_input, key)
+                await self.terminal.flush()
+        except EOFError:
+            pass
+        self.stop()
+
+    async def _redraw(self):
+        await self._call(self.render or self.update)
+        await self.terminal.flush()
+
+    async def _frame_loop(self):
+        adaptor = self.terminal.adaptor
+        in_frame = False
+        # one frame is opened per scheduler frame, however many fixed steps
+        # it runs, and the whole frame is sent by one flush, inside
+        # synchronized output markers
+        def begin():
+            nonlocal in_frame
+            if not in_frame:
+                adaptor.frame_begin()
+                in_frame = True
+        def update(dt):
+            begin()
+            return self.update()
+        async def render():
+            nonlocal in_frame
+            begin()
+            if self.render is not None:
+                await self._call(self.render)
+            adaptor.frame_end(flush=False)
+            in_frame = False
+            await self.terminal.flush()
+        await self.scheduler.run_async(update, render, lambda: self._running)
+
+    async def run(self):
+        """Run the app until stop() is called or input ends.
+        """
+        if self._running:
+            raise RuntimeError("AsyncTerminalApp already running!")
+        t = self.terminal.open()
+        t.set_cbreak(True)
+        t.clear()
+        t._handle_resize()
+        await self._call(self.update)
+        if self.render is not None:
+            await self._call(self.render)
+        await t.flush()
+        self._running = True
+
+        self._tasks = [asyncio.ensure_future(self._input_loop())]
+        if self.scheduler is not None:
+            self._tasks.append(asyncio.ensure_future(self._frame_loop()))
+        try:
+            await asyncio.gather(*self._tasks)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.stop()
+            await self._cleanup()
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        current = asyncio.current_task()
+        for task in self._tasks:
+            if task is not current:
+                task.cancel()
+
+    async def _cleanup(self):
+        t = self.terminal
+        t.cursor_to(0, 0)
+        t.clear()
+        await t.flush()
+        t.close()
+        t.reset()
@@ -0,0 +1,382 @@
+"""Headless benchmarks of rendering and input parsing.
+Each rendering workload draws frames into a HeadlessAdaptor, so nothing is
+written to a real terminal. The workloads are synthetic: most draw the way
+one of the scripts in pytermfx/examples does (those run on import, so they
+can't be reused here), with input replaced by a seeded random generator.
+When an example changes how it draws, its workload should follow. Run them
+with:
+    python -m pytermfx.bench [workload ...] [--frames N] [--size WxH] [--json]
+"""
+
+from pytermfx import Terminal, Color, ColorMode, NamedColor, Style
+from pytermfx.adaptors import HeadlessAdaptor
+from pytermfx.escapes import parse_escape
+from pytermfx.metrics import MetricsRecorder
+from pytermfx.particles import ParticleSystem
+from pytermfx.tools import draw_progress
+import pytermfx.md as md
+from functools import partial
+import io
+import math
+import platform
+import random
+import time
+import tracemalloc
+
+COLOR_MODES = {
+    "16": ColorMode.MODE_16,
+    "256": ColorMode.MODE_256,
+    "rgb": ColorMode.MODE_RGB}
+
+def make_terminal(w=80, h=24, color_mode=ColorMode.MODE_256):
+    """Construct a Terminal that renders into memory.
+    """
+    t = Terminal(None, io.StringIO(), adaptor=partial(HeadlessAdaptor, size=(w, h)))
+    t.set_color_mode(color_mode)
+    return t
+
+# Rendering workloads: setup(terminal, rng) returns a function that draws
+# and flushes one frame.
+WORKLOADS = {}
+
+def workload(name):
+    def register(setup):
+        WORKLOADS[name] = setup
+        return setup
+    return register
+
+@workload("mandelbrot")
+def _mandelbrot(t, rng):
+    # examples/mandelbrot.py, zooming in every frame
+    MAX = 50
+    state = {"scale": 0.05}
+    def mandelbrot(i, j):
+        real = i
+        imag = j
+        for n in range(MAX):
+            real2 = real*real
+            imag2 = imag*imag
+            if real2 + imag2 > 4.0:
+                return n
+            imag = 2* real*imag + j
+            real = real2 - imag2 + i
+        return 0
+    def frame():
+        scale = state["scale"]
+        for y in range(t.h):
+            t.cursor_to(0, y)
+            for x in range(t.w):
+                cx = (x - t.w / 2) * scale - 0.5
+                cy = (y - t.h / 2) * scale * 2
+                n = mandelbrot(cx, cy)
+                t.style(Color.hsl(n / MAX, 1.0, 0.5).bg())
+                t.write(" ")
+        t.style(Style("bold"), NamedColor("black"), NamedColor("white").bg())
+        t.cursor_to(1, 1).write("WASD to move")
+        t.cursor_to(1, 2).write("Q to quit")
+        t.style_reset()
+        t.flush()
+        state["scale"] *= 0.98
+    return frame
+
+@workload("colorwheel")
+def _colorwheel(t, rng):
+    # examples/colorwheel.py, rotating every frame
+    state = {"angle": 0.0}
+    def frame():
+        for y in range(t.h):
+            t.cursor_to(0, y)
+            for x in range(t.w):
+                dx = (x/t.w - 0.5) / 0.5
+                dy = (y/t.h - 0.5) / 0.5
+                a = math.atan2(dy, dx) + state["angle"]
+                d = math.sqrt(dx ** 2 + dy ** 2)
+                t.style(Color.hsl((a / (math.pi * 2)) % 1, 1.0, max(0, 1 - d)).bg())
+                t.write(" ")
+        t.style_reset()
+        t.flush()
+        state["angle"] += 0.05
+    return frame
+
+@workload("particles")
+def _particles(t, rng):
+    # examples/particles.py, with a "mouse" that moves in a circle
+    particles = ParticleSystem(gravity=(0, 0.1), bounds=(0, 0, t.w, t.h))
+    state = {"frame": 0, "emitted": 0, "mx": t.w / 2, "my": t.h / 2}
+    def frame():
+        n = state["frame"]
+        px, py = state["mx"], state["my"]
+        mx = t.w / 2 + math.cos(n / 4) * t.w / 3
+        my = t.h / 2 + math.sin(n / 4) * t.h / 3
+        dx = mx - px
+        dy = my - py
+        l = math.sqrt(dx ** 2 + dy ** 2)
+        d = math.atan2(dy, dx)
+        j = min(15, int(l))
+        for i in range(j):
+            f = i / j
+            ll = l * rng.uniform(0.25, 0.5)
+            dd = d + rng.uniform(-0.2, 0.2)
+            particles.emit(px + dx * f, py + dy * f, ll * math.cos(dd),
+                           ll * math.sin(dd), color=state["emitted"])
+            state["emitted"] += 1
+        particles.update()
+        particles.draw(t)
+        t.flush()
+        state["frame"] = n + 1
+        state["mx"], state["my"] = mx, my
+    return frame
+
+@workload("particles-20k")
+def _particles_many(t, rng):
+    # a steady population of 20000 particles in a ParticleSystem
+    ps = ParticleSystem(capacity=20000, gravity=(0, 0.02),
+                        bounds=(0, 0, t.w, t.h))
+    state = {"emitted": 0}
+    def frame():
+        n = 20000 - ps.count
+        if n:
+            ps.emit_many([rng.uniform(0, t.w) for _ in range(n)],
+                         [rng.uniform(0, t.h / 2) for _ in range(n)],
+                         [rng.uniform(-0.5, 0.5) for _ in range(n)],
+                         [rng.uniform(-0.5, 0.2) for _ in range(n)],
+                         list(range(state["emitted"], state["emitted"] + n)),
+                         [rng.uniform(10, 100) for _ in range(n)])
+            state["emitted"] += n
+        ps.update()
+        ps.draw(t)
+        t.flush()
+    return frame
+
+@workload("pipes")
+def _pipes(t, rng):
+    # examples/pipes.py, with more pipes and no resets
+    CHARS = "║═╚╝╔╗"
+    pipes = []
+    for _ in range(20):
+        v = rng.choice(((1, 0), (-1, 0), (0, 1), (0, -1)))
+        pipes.append([rng.randrange(t.w), rng.randrange(t.h), v[0], v[1],
+                      Color.hsl(rng.random(), 0.5, 0.5)])
+    def connector(vx0, vy0, vx1, vy1):
+        if vx0 < vx1:
+            return CHARS[4] if vy0 < vy1 else CHARS[2]
+        return CHARS[5] if vy0 < vy1 else CHARS[3]
+    def frame():
+        for p in pipes:
+            x, y, vx, vy, color = p
+            turned = rng.random() < 0.08
+            if turned:
+                if vx != 0:
+                    nvx, nvy = 0, rng.choice((-1, 1))
+                else:
+                    nvx, nvy = rng.choice((-1, 1)), 0
+            else:
+                nvx, nvy = vx, vy
+            t.cursor_to(x, y)
+            t.style(color)
+            if turned:
+                t.write(connector(vx, vy, nvx, nvy))
+            else:
+                t.write(CHARS[0] if vy != 0 else CHARS[1])
+            p[0] = (x + nvx) % t.w
+            p[1] = (y + nvy) % t.h
+            p[2], p[3] = nvx, nvy
+        t.flush()
+    return frame
+
+@workload("progress")
+def _progress(t, rng):
+    # examples/progress_bar.py
+    state = {"progress": 0.0}
+    def frame():
+        t.cursor_to(0, 0)
+        draw_progress(t, state["progress"], color=NamedColor("green"),
+                      bar_left=30, label="Spooling up progress bars...")
+        state["progress"] = (state["progress"] + 0.0237) % 1
+    return frame
+
+SAMPLE_MARKDOWN = """# pytermfx
+## Terminal interaction and formatting
+Some **bold text**, some *italic text*, some __underlined text__ and
+some `inline code`, with a [link][ref] and [another](http://example.com).
+
+* Cursor movement, screen clearing, etc.
+* Text coloring in **256-color** or *True Color* RGB format
+	* Nested list item with `code`
+
+### Code
+```python
+t = Terminal()
+t.style(Color.hex(0xFF0000)).writeln("red")
+```
+
+[ref]: https://github.com/loganzartman/pytermfx
+"""
+
+@workload("markdown")
+def _markdown(t, rng):
+    doc = SAMPLE_MARKDOWN * 4
+    def frame():
+        t.cursor_to(0, 0)
+        md.render(t, doc)
+        t.flush()
+    return frame
+
+@workload("markdown-100k")
+def _markdown_large(t, rng):
+    # a large document, to measure throughput rather than latency
+    doc = SAMPLE_MARKDOWN * (100000 // len(SAMPLE_MARKDOWN))
+    def frame():
+        t.cursor_to(0, 0)
+        md.render(t, doc)
+        t.flush()
+    return frame
+
+@workload("markdown-pager")
+def _markdown_pager(t, rng):
+    # redisplaying a wrapped, cached layout, as a help screen or pager does
+    doc = SAMPLE_MARKDOWN * (100000 // len(SAMPLE_MARKDOWN))
+    state = {"top": 0}
+    def frame():
+        page = md.layout(doc, t.w)
+        page.draw(t, 0, 0, start=state["top"], count=t.h)
+        t.flush()
+        state["top"] = (state["top"] + 1) % max(1, page.height - t.h)
+    return frame
+
+def run_workload(name, frames=100, w=80, h=24, color_mode=ColorMode.MODE_256,
+                 allocations=True, seed=0):
+    """Run a rendering workload and measure it.
+    Returns a dict of results.
+    """
+    t = make_terminal(w, h, color_mode)
+    out = t.adaptor.out_file
+    frame = WORKLOADS[name](t, random.Random(seed))
+
+    # one untimed frame to fill caches
+    frame()
+    out.seek(0)
+    out.truncate()
+
+    def run(n):
+        for _ in range(n):
+            frame()
+            if out.tell() > 1 << 22:
+                out.seek(0)
+                out.truncate()
+
+    # timing, then output measurements separately so they don't skew it
+    start = time.perf_counter()
+    run(frames)
+    elapsed = time.perf_counter() - start
+    recorder = MetricsRecorder(window=frames)
+    t.set_metrics(recorder)
+    run(frames)
+    t.set_metrics(None)
+
+    result = {
+        "workload": name,
+        "frames": frames,
+        "size": [w, h],
+        "color_mode": color_mode.name,
+        "seconds": elapsed,
+        "fps": frames / elapsed if elapsed > 0 else None,
+        "flushes_per_frame": recorder.flushes / frames,
+        "bytes_per_frame": recorder.bytes / frames,
+        "escapes_per_frame": recorder.escapes / frames,
+        "writes_per_frame": recorder.writes / frames,
+        "bytes_by_category": {k: v / frames
+                              for k, v in recorder.categories.items()}}
+    if allocations:
+        result.update(_measure_allocations(frame, out, max(1, frames // 10)))
+    return result
+
+def _measure_allocations(func, out, n):
+    """Trace the memory allocated by n calls of func.
+    """
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        if hasattr(tracemalloc, "reset_peak"):
+            # Python 3.9+; before that the peak includes the snapshot
+            tracemalloc.reset_peak()
+        for _ in range(n):
+            func()
+            out.seek(0)
+            out.truncate()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    return {
+        "alloc_peak_bytes": peak,
+        "alloc_blocks_per_frame": sum(max(0, s.count_diff) for s in stats) / n,
+        "alloc_bytes_per_frame": sum(max(0, s.size_diff) for s in stats) / n}
+
+def recorded_input(n=200, seed=0):
+    """Generate an input stream like one recorded from a terminal: typing,
+    arrow keys, modified keys and bursts of mouse motion.
+    """
+    rng = random.Random(seed)
+    parts = []
+    for _ in range(n):
+        kind = rng.random()
+        if kind < 0.4:
+            parts.append("".join(rng.choice("abcdefghij klmnop") for _ in range(8)))
+        elif kind < 0.55:
+            parts.append(rng.choice(("\x1b[A", "\x1b[B", "\x1b[C", "\x1b[D",
+                                     "\x1b[1;5C", "\x1b[3~", "\x1b[5~", "\x1bOP")))
+        elif kind < 0.9:
+            x, y = rng.randrange(1, 200), rng.randrange(1, 60)
+            parts.append("".join("\x1b[<35;{};{}M".format(x + i, y)
+                                 for i in range(rng.randrange(1, 10))))
+        else:
+            parts.append("\x1b[<0;10;10M\x1b[<0;10;10m\x1b[M #!")
+    return "".join(parts)
+
+def run_parse(frames=100, stream=None, allocations=True):
+    """Measure parse_escape() on an input stream (recorded_input() by
+    default). Each frame parses the whole stream once.
+    """
+    if stream is None:
+        stream = recorded_input()
+    events = len(list(parse_escape(stream)))
+    start = time.perf_counter()
+    for _ in range(frames):
+        for _ in parse_escape(stream):
+            pass
+    elapsed = time.perf_counter() - start
+    result = {
+        "workload": "parse",
+        "frames": frames,
+        "seconds": elapsed,
+        "fps": frames / elapsed if elapsed > 0 else None,
+        "chars_per_frame": len(stream),
+        "events_per_frame": events,
+        "events_per_second": events * frames / elapsed if elapsed > 0 else None}
+    if allocations:
+        result.update(_measure_allocations(
+            lambda: list(parse_escape(stream)), _NullOut(), max(1, frames // 10)))
+    return result
+
+class _NullOut:
+    def seek(self, pos):
+        pass
+    def truncate(self):
+        pass
+
+def environment():
+    """Describe where the benchmarks ran.
+    """
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "numpy": numpy_version,
+        "time": time.time()}
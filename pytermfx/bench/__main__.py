@@ -0,0 +1,76 @@
+"""Command line entry point: python -m pytermfx.bench
+"""
+
+from pytermfx.bench import (WORKLOADS, COLOR_MODES, run_workload, run_parse,
+                            environment)
+import argparse
+import json
+import sys
+
+def main(argv=None):
+    names = list(WORKLOADS) + ["parse"]
+    parser = argparse.ArgumentParser(prog="python -m pytermfx.bench",
+        description="Benchmark pytermfx rendering and input parsing headlessly.")
+    parser.add_argument("workloads", nargs="*", metavar="workload",
+        help="workloads to run (default: all): " + ", ".join(names))
+    parser.add_argument("--frames", type=int, default=100,
+        help="frames to render per workload (default: 100)")
+    parser.add_argument("--size", default="80x24",
+        help="terminal size as WxH (default: 80x24)")
+    parser.add_argument("--color-mode", choices=COLOR_MODES, default="256",
+        help="color mode (default: 256)")
+    parser.add_argument("--input", metavar="FILE",
+        help="recorded input stream for the parse workload")
+    parser.add_argument("--no-alloc", action="store_true",
+        help="skip allocation tracing")
+    parser.add_argument("--json", action="store_true",
+        help="print results as JSON")
+    parser.add_argument("-o", "--output", metavar="FILE",
+        help="also write JSON results to FILE")
+    args = parser.parse_args(argv)
+
+    unknown = [n for n in args.workloads if n not in names]
+    if unknown:
+        parser.error("unknown workload: " + ", ".join(unknown))
+    try:
+        w, h = (int(n) for n in args.size.lower().split("x"))
+    except ValueError:
+        parser.error("size must look like 80x24")
+
+    results = []
+    for name in args.workloads or names:
+        if name == "parse":
+            stream = None
+            if args.input:
+                with open(args.input, encoding="utf-8", errors="replace") as f:
+                    stream = f.read()
+            result = run_parse(args.frames, stream, not args.no_alloc)
+        else:
+            result = run_workload(name, args.frames, w, h,
+                                  COLOR_MODES[args.color_mode],
+                                  not args.no_alloc)
+        results.append(result)
+        if not args.json:
+            _print_result(result)
+
+    report = {"environment": environment(), "results": results}
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+def _print_result(r):
+    line = "{:<12} {:>9.1f} fps".format(r["workload"], r["fps"] or 0)
+    if "bytes_per_frame" in r:
+        line += " {:>10.0f} B/frame {:>8.0f} esc/frame".format(
+            r["bytes_per_frame"], r["escapes_per_frame"])
+    else:
+        line += " {:>10.0f} events/s".format(r["events_per_second"] or 0)
+    if "alloc_blocks_per_frame" in r:
+        line += " {:>8.0f} allocs/frame".format(r["alloc_blocks_per_frame"])
+    print(line)
+
+if __name__ == "__main__":
+    main()
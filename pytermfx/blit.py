@@ -0,0 +1,161 @@
+"""Bulk rendering of whole blocks of cells.
+With NumPy installed, colors are quantized for the terminal's color mode in
+a single vectorized pass and neighboring cells that end up with the same
+escape sequence are written as one run. Without NumPy (or when given plain
+lists), the same thing is done in pure Python.
+"""
+
+from pytermfx import quantize
+from pytermfx.color import Color, ColorMode
+from pytermfx.style import Style
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+def _np_keys(colors, mode):
+    """Map an HxWx3 array of colors to an HxW array of palette keys.
+    Cells with equal keys produce the same escape sequence.
+    """
+    c = colors.astype(np.int32)
+    r = c[..., 0]
+    g = c[..., 1]
+    b = c[..., 2]
+    if mode == ColorMode.MODE_RGB:
+        return (r << 16) | (g << 8) | b
+    if mode == ColorMode.MODE_256:
+        scale_6 = np.frombuffer(quantize.SCALE_6, dtype=np.uint8).astype(np.int32)
+        scale_24 = np.frombuffer(quantize.SCALE_24, dtype=np.uint8).astype(np.int32)
+        cube = 16 + scale_6[r] * 36 + scale_6[g] * 6 + scale_6[b]
+        gray = np.where(r == 255, 231, 232 + scale_24[r])
+        return np.where((r == g) & (g == b), gray, cube)
+    shift = 8 - quantize.TABLE_BITS
+    table = np.frombuffer(quantize.table_16(), dtype=np.uint8)
+    return table[((r >> shift) << (2 * quantize.TABLE_BITS)) |
+                 ((g >> shift) << quantize.TABLE_BITS) |
+                 (b >> shift)]
+
+def _np_row_text(chars, row):
+    if chars.dtype.kind == "U":
+        return "".join(chars[row].tolist())
+    return chars[row].astype("<u4").tobytes().decode("utf-32-le")
+
+def _rgb(c):
+    if isinstance(c, Color):
+        return (c.r, c.g, c.b)
+    return tuple(c)
+
+def _py_key(c, mode):
+    r, g, b = _rgb(c)
+    if mode == ColorMode.MODE_RGB:
+        return (r, g, b)
+    if mode == ColorMode.MODE_256:
+        return quantize.index_256(int(r), int(g), int(b))
+    return quantize.index_16(int(r), int(g), int(b))
+
+def _shape(*things):
+    for thing in things:
+        if thing is None:
+            continue
+        if np is not None and isinstance(thing, np.ndarray):
+            return thing.shape[0], thing.shape[1]
+        return len(thing), (len(thing[0]) if len(thing) else 0)
+    return 0, 0
+
+def blit(terminal, chars=None, fg=None, bg=None, x=0, y=0):
+    """Draw a block of cells with its top left corner at (x, y).
+    chars - HxW array of code points (or of 1-character strings), a list of
+            strings, or None for spaces
+    fg    - HxWx3 array of RGB values, nested lists of RGB tuples or Colors,
+            or None for the default foreground
+    bg    - same as fg, for the background
+    The block is clipped to the terminal. Colors are quantized according to
+    the terminal's color mode; adjacent cells with the same quantized colors
+    are written together.
+    """
+    h, w = _shape(chars, fg, bg)
+    x = int(x)
+    y = int(y)
+    col0 = max(0, -x)
+    col1 = min(w, terminal.w - x)
+    row0 = max(0, -y)
+    row1 = min(h, terminal.h - y)
+    if col0 >= col1 or row0 >= row1:
+        return
+
+    mode = terminal.get_color_mode()
+    vectorized = np is not None and any(
+        isinstance(a, np.ndarray) for a in (chars, fg, bg))
+    if vectorized:
+        if fg is not None:
+            fg = np.asarray(fg)
+            fg_keys = _np_keys(fg, mode)
+        if bg is not None:
+            bg = np.asarray(bg)
+            bg_keys = _np_keys(bg, mode)
+
+    # one Color per quantized key, taken from the first cell that uses it
+    fg_colors = {}
+    bg_colors = {}
+
+    terminal.style(Style.none)
+    for row in range(row0, row1):
+        # text for the row
+        if chars is None:
+            text = " " * w
+        elif vectorized and isinstance(chars, np.ndarray):
+            text = _np_row_text(chars, row)
+        else:
+            text = "".join(chars[row]) if not isinstance(chars[row], str) else chars[row]
+
+        # find the columns where the quantized colors change
+        fg_row = bg_row = None
+        if vectorized:
+            change = np.zeros(col1 - col0, dtype=bool)
+            change[0] = True
+            if fg is not None:
+                keys = fg_keys[row, col0:col1]
+                change[1:] |= keys[1:] != keys[:-1]
+                fg_row = fg[row].tolist()
+                fg_key_row = fg_keys[row].tolist()
+            if bg is not None:
+                keys = bg_keys[row, col0:col1]
+                change[1:] |= keys[1:] != keys[:-1]
+                bg_row = bg[row].tolist()
+                bg_key_row = bg_keys[row].tolist()
+            starts = (np.flatnonzero(change) + col0).tolist()
+        else:
+            if fg is not None:
+                fg_row = fg[row]
+                fg_key_row = [_py_key(c, mode) for c in fg_row]
+            if bg is not None:
+                bg_row = bg[row]
+                bg_key_row = [_py_key(c, mode) for c in bg_row]
+            starts = []
+            last = None
+            for col in range(col0, col1):
+                key = (fg_key_row[col] if fg_row is not None else None,
+                       bg_key_row[col] if bg_row is not None else None)
+                if key != last:
+                    starts.append(col)
+                    last = key
+
+        # write one styled run per change
+        terminal.cursor_to(x + col0, y + row)
+        ends = starts[1:] + [col1]
+        for start, end in zip(starts, ends):
+            if fg_row is not None:
+                color = fg_colors.get(fg_key_row[start])
+                if color is None:
+                    color = Color(*_rgb(fg_row[start]))
+                    fg_colors[fg_key_row[start]] = color
+                terminal.style(color)
+            if bg_row is not None:
+                color = bg_colors.get(bg_key_row[start])
+                if color is None:
+                    color = Color(*_rgb(bg_row[start]), bg=True)
+                    bg_colors[bg_key_row[start]] = color
+                terminal.style(color)
+            terminal.write(text[start:end])
+    terminal.style(Style.none)
@@ -0,0 +1,218 @@
+"""Pixel graphics drawn with block and braille characters.
+"""
+
+from pytermfx.color import Color
+from pytermfx.style import Style
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+HALF = "half"        # 1x2 pixels per cell using half blocks
+BRAILLE = "braille"  # 2x4 pixels per cell using braille dots
+
+CELL_SIZE = {HALF: (1, 2), BRAILLE: (2, 4)}
+
+# bit of the braille glyph for each (x, y) dot in a cell
+_BRAILLE_BITS = ((0x01, 0x02, 0x04, 0x40), (0x08, 0x10, 0x20, 0x80))
+
+def _rgb(color):
+    if isinstance(color, Color):
+        return (color.r, color.g, color.b)
+    r, g, b = color
+    return (int(r), int(g), int(b))
+
+class Canvas:
+    """A framebuffer of RGB pixels that renders to terminal cells.
+    In HALF mode, every cell shows two pixels stacked vertically.
+    In BRAILLE mode, every cell shows 2x4 dots; a dot is lit if its pixel
+    differs from the background, and each cell takes the color of its
+    first lit dot.
+    Colors may be a Color or an (r, g, b) tuple.
+    """
+    def __init__(self, w, h, mode=HALF, background=(0, 0, 0)):
+        """Construct a canvas of w by h pixels.
+        """
+        if mode not in CELL_SIZE:
+            raise ValueError("mode must be HALF or BRAILLE.")
+        self.w = int(w)
+        self.h = int(h)
+        self.mode = mode
+        self.background = _rgb(background)
+        self._pixels = bytearray(bytes(self.background) * (self.w * self.h))
+
+    @staticmethod
+    def for_terminal(terminal, mode=HALF, background=(0, 0, 0)):
+        """Construct a canvas that covers a whole terminal.
+        """
+        cw, ch = CELL_SIZE[mode]
+        return Canvas(terminal.w * cw, terminal.h * ch, mode, background)
+
+    def array(self):
+        """Get an HxWx3 NumPy view of the pixels. Writes to the view change
+        the canvas. Requires NumPy.
+        """
+        if np is None:
+            raise RuntimeError("Canvas.array() requires NumPy.")
+        return np.frombuffer(self._pixels, dtype=np.uint8).reshape(
+            self.h, self.w, 3)
+
+    def clear(self, color=None):
+        """Fill the whole canvas with a color (the background by default).
+        """
+        color = self.background if color is None else _rgb(color)
+        self._pixels[:] = bytes(color) * (self.w * self.h)
+        return self
+
+    def set_pixel(self, x, y, color):
+        x = int(x)
+        y = int(y)
+        if 0 <= x < self.w and 0 <= y < self.h:
+            i = (y * self.w + x) * 3
+            self._pixels[i:i+3] = bytes(_rgb(color))
+        return self
+
+    def get_pixel(self, x, y):
+        i = (int(y) * self.w + int(x)) * 3
+        return tuple(self._pixels[i:i+3])
+
+    def fill_rect(self, x, y, w, h, color):
+        x0 = max(int(x), 0)
+        x1 = min(int(x + w), self.w)
+        if x0 >= x1:
+            return self
+        run = bytes(_rgb(color)) * (x1 - x0)
+        for row in range(max(int(y), 0), min(int(y + h), self.h)):
+            i = (row * self.w + x0) * 3
+            self._pixels[i:i+len(run)] = run
+        return self
+
+    def line(self, x0, y0, x1, y1, color):
+        """Draw a line between two pixels (Bresenham's algorithm).
+        """
+        color = _rgb(color)
+        x0, y0, x1, y1 = int(x0), int(y0), int(x1), int(y1)
+        dx = abs(x1 - x0)
+        dy = -abs(y1 - y0)
+        sx = 1 if x0 < x1 else -1
+        sy = 1 if y0 < y1 else -1
+        err = dx + dy
+        while True:
+            self.set_pixel(x0, y0, color)
+            if x0 == x1 and y0 == y1:
+                break
+            e2 = 2 * err
+            if e2 >= dy:
+                err += dy
+                x0 += sx
+            if e2 <= dx:
+                err += dx
+                y0 += sy
+        return self
+
+    def _rows(self):
+        """Generate the (ch, fg, bg) cells of each row of the canvas.
+        fg and bg are RGB tuples.
+        """
+        px = self._pixels
+        w = self.w
+        stride = w * 3
+        if self.mode == HALF:
+            for top in range(0, self.h, 2):
+                upper = px[top*stride:(top+1)*stride]
+                if top + 1 < self.h:
+                    lower = px[(top+1)*stride:(top+2)*stride]
+                else:
+                    lower = bytes(self.background) * w
+                yield [("▀", tuple(upper[i:i+3]), tuple(lower[i:i+3]))
+                       for i in range(0, stride, 3)]
+            return
+
+        bg = self.background
+        bg_bytes = bytes(bg)
+        for top in range(0, self.h, 4):
+            row = []
+            for left in range(0, w, 2):
+                bits = 0
+                fg = None
+                for dx in range(2):
+                    if left + dx >= w:
+                        continue
+                    for dy in range(4):
+                        if top + dy >= self.h:
+                            continue
+                        i = ((top + dy) * w + left + dx) * 3
+                        if px[i:i+3] != bg_bytes:
+                            bits |= _BRAILLE_BITS[dx][dy]
+                            if fg is None:
+                                fg = tuple(px[i:i+3])
+                if bits:
+                    row.append((chr(0x2800 + bits), fg, bg))
+                else:
+                    row.append((" ", None, bg))
+            yield row
+
+    def render(self, terminal, x=0, y=0):
+        """Draw the canvas onto a Terminal with its top left corner at cell
+        (x, y). Only the color changes between neighboring cells are sent.
+        """
+        colors = {}
+        def color(rgb, bg=False):
+            c = colors.get((rgb, bg))
+            if c is None:
+                c = colors[(rgb, bg)] = Color(*rgb, bg=bg)
+            return c
+
+        terminal.style(Style.none)
+        fg = bg = None
+        for row, cells in enumerate(self._rows()):
+            if not 0 <= y + row < terminal.h:
+                continue
+            terminal.cursor_to(max(x, 0), y + row)
+            run = []
+            for col, (ch, cell_fg, cell_bg) in enumerate(cells):
+                if not 0 <= x + col < terminal.w:
+                    continue
+                if ch == "▀":
+                    if cell_fg == cell_bg:
+                        # a blank cell only needs a background
+                        ch, cell_fg = " ", fg
+                    elif ((cell_bg != fg) + (cell_fg != bg) <
+                          (cell_fg != fg) + (cell_bg != bg)):
+                        # flip the block to reuse the current colors
+                        ch, cell_fg, cell_bg = "▄", cell_bg, cell_fg
+                elif cell_fg is None:
+                    cell_fg = fg
+                if cell_fg != fg or cell_bg != bg:
+                    if run:
+                        terminal.write("".join(run))
+                        run = []
+                    if cell_fg != fg:
+                        terminal.style(color(cell_fg))
+                        fg = cell_fg
+                    if cell_bg != bg:
+                        terminal.style(color(cell_bg, True))
+                        bg = cell_bg
+                run.append(ch)
+            terminal.write("".join(run))
+        terminal.style(Style.none)
+        return self
+
+    def render_to(self, screen, x=0, y=0):
+        """Draw the canvas into a ScreenBuffer with its top left corner at
+        cell (x, y), to be sent by the next present().
+        """
+        colors = {}
+        def color(rgb, bg=False):
+            if rgb is None:
+                return None
+            c = colors.get((rgb, bg))
+            if c is None:
+                c = colors[(rgb, bg)] = Color(*rgb, bg=bg)
+            return c
+
+        for row, cells in enumerate(self._rows()):
+            for col, (ch, fg, bg) in enumerate(cells):
+                screen.put(x + col, y + row, ch, color(fg), color(bg, True))
+        return self
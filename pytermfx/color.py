@@ -1,7 +1,8 @@
 from pytermfx.constants import *
+from pytermfx import quantize
 from enum import Enum
+from functools import lru_cache
 import colorsys
-import math
 
 class ColorMode(Enum):
 	"""Represents the various types of ANSI escapes that set colors.
@@ -16,84 +17,133 @@ class ColorMode(Enum):
 	MODE_256 = 1
 	MODE_RGB = 2
 
+# largest number of colors kept in each intern table
+INTERN_LIMIT = 1 << 16
+_BG_BIT = 1 << 24
+
 class Color:
-	def __init__(self, r, g, b, bg=False):
+	"""An immutable RGB color, packed into a single int.
+	Colors are interned: constructing the same color twice usually returns
+	the same object, and its escape strings are computed only once.
+	"""
+	__slots__ = ("_value",)
+	_interned = {}
+	_escapes = {}
+
+	def __init_subclass__(cls, **kwargs):
+		super().__init_subclass__(**kwargs)
+		cls._interned = {}
+		cls._escapes = {}
+
+	def __new__(cls, r, g, b, bg=False):
 		"""Construct a color from given r,g,b values.
 		Values should be in the range [0, 255]
 		"""
-		clip = lambda c: int(max(0, min(255, c)))
-		self.r = clip(r)
-		self.g = clip(g)
-		self.b = clip(b)
-		self._bg = bg
+		value = ((int(max(0, min(255, r))) << 16) |
+		         (int(max(0, min(255, g))) << 8) |
+		          int(max(0, min(255, b))))
+		return cls._from_value(value | _BG_BIT if bg else value)
+
+	@classmethod
+	def _from_value(cls, value):
+		"""Retrieve the interned color with a given packed value.
+		"""
+		color = cls._interned.get(value)
+		if color is None:
+			if len(cls._interned) >= INTERN_LIMIT:
+				cls._interned.clear()
+			color = object.__new__(cls)
+			object.__setattr__(color, "_value", value)
+			cls._interned[value] = color
+		return color
+
+	def __setattr__(self, name, value):
+		raise AttributeError("{} is immutable".format(type(self).__name__))
+
+	def __reduce__(self):
+		return (type(self)._from_value, (self._value,))
+
+	def __eq__(self, other):
+		return type(other) is type(self) and other._value == self._value
+
+	def __hash__(self):
+		return hash(self._value)
+
+	def __repr__(self):
+		return "{}({}, {}, {}{})".format(type(self).__name__,
+			self.r, self.g, self.b, ", bg=True" if self._bg else "")
+
+	@property
+	def r(self):
+		return (self._value >> 16) & 0xFF
+
+	@property
+	def g(self):
+		return (self._value >> 8) & 0xFF
+
+	@property
+	def b(self):
+		return self._value & 0xFF
+
+	@property
+	def _bg(self):
+		return self._value >= _BG_BIT
 
 	def bg(self):
-		"""Make this a background color.
+		"""Get the background version of this color.
 		"""
-		self._bg = True
-		return self
+		return self._from_value(self._value | _BG_BIT)
 
 	def fg(self):
-		"""Make this a foreground color.
+		"""Get the foreground version of this color.
 		"""
-		self._bg = False
-		return self
+		return self._from_value(self._value & ~_BG_BIT)
 
 	@staticmethod
 	def hex(hex):
 		"""Construct a color from a given hex value.
 		Red is: 0xFF0000
 		"""
-		return Color(
-			(hex >> 16) & 0xFF,
-			(hex >>  8) & 0xFF,
-			 hex        & 0xFF)
+		return Color._from_value(hex & 0xFFFFFF)
 
 	@staticmethod
 	def rgb(r, g, b):
 		return Color(r * 255, g * 255, b * 255)
 
 	@staticmethod
+	@lru_cache(maxsize=4096)
 	def hsl(h, s, l):
 		r, g, b = colorsys.hls_to_rgb(h, l, s)
 		return Color.rgb(r, g, b)
 
 	def to_mode(self, color_mode):
 		"""Output a string in a given ANSI color format.
+		The result is cached per color and mode.
 		"""
+		key = (self._value, color_mode)
+		esc = self._escapes.get(key)
+		if esc is not None:
+			return esc
 		if color_mode == ColorMode.MODE_16:
-			return self.ansi_16()
-		if color_mode == ColorMode.MODE_256:
-			return self.ansi_256()
-		if color_mode == ColorMode.MODE_RGB:
-			return self.ansi_rgb()
-		raise ValueError("color_mode is invalid. Should be a ColorMode enum.")
+			esc = self.ansi_16()
+		elif color_mode == ColorMode.MODE_256:
+			esc = self.ansi_256()
+		elif color_mode == ColorMode.MODE_RGB:
+			esc = self.ansi_rgb()
+		else:
+			raise ValueError("color_mode is invalid. Should be a ColorMode enum.")
+		if len(self._escapes) >= INTERN_LIMIT:
+			self._escapes.clear()
+		self._escapes[key] = esc
+		return esc
 
 	def ansi_16(self):
 		"""Convert this color into ANSI 3/4-bit color format.
 		Red foreground is converted to: "91"
-		This converter is slow and inaccurate.
+		Uses the closest named color (xterm defaults) according to the
+		distance metric chosen with pytermfx.quantize.set_metric().
 		"""
-		# list of named ANSI colors and xterm color values
-		colors = ((0,0,0), (205,0,0), (0,205,0), (205,205,0),
-			(0,0,238), (205,0,205), (0,205,205), (229,229,229),
-			(127,127,127), (255,0,0), (0,255,0), (255,255,0),
-			(92,92,255), (255,0,255), (0,255,255), (255,255,255))
-		ids = list(range(0, 8)) + list(range(60, 68))
-
-		def dist(a, b):
-			return math.sqrt(
-				(a[0] - b[0]) ** 2 + 
-				(a[1] - b[1]) ** 2 + 
-				(a[2] - b[2]) ** 2)
-
-		# find closest (euclidean) named color (xterm defaults) to input
-		own_col = (self.r, self.g, self.b)
-		min_i = 0
-		for i, col in enumerate(colors):
-			if dist(colors[i], own_col) < dist(colors[min_i], own_col):
-				min_i = i
-		return CSI + str((40 if self._bg else 30) + ids[min_i]) + "m"
+		return quantize.escape_16(self.r, self.g, self.b, self._bg)
 
 	def ansi_256(self):
 		"""Convert this color into ANSI 8-bit color format.
@@ -101,45 +151,54 @@ class Color:
 		This converter emits the 216 RGB colors and the 24 grayscale colors.
 		It does not use the 16 named colors.
 		"""
-		if self.r == self.g == self.b:
-			# grayscale case
-			if self.r == 255: # pure white
-				col = 231
-			else:
-				col = 232 + int(self.r / 256 * 24)
-		else:
-			# 216-color RGB
-			scale = lambda c: int(c / 256 * 6)
-			col = 16
-			col += scale(self.b)
-			col += scale(self.g) * 6
-			col += scale(self.r) * 6 * 6
-		return CSI + ("48;5;" if self._bg else "38;5;") + str(col) + "m"
+		return quantize.escape_256(self.r, self.g, self.b, self._bg)
 
 	def ansi_rgb(self):
 		"""Convert this color into ANSI RGB color format.
 		Red foreground is converted to: "38;2;255;0;0"
 		"""
-		r = str(self.r)
-		g = str(self.g)
-		b = str(self.b)
-		esc = ("48;2;" if self._bg else "38;2;")
-		return "".join((CSI, esc, r, ";", g, ";", b)) + "m"
+		return quantize.escape_rgb(self.r, self.g, self.b, self._bg)
 
 class NamedColor(Color):
 	"""Implements a color that is always one of the 16 named colors.
 	"""
-	def __init__(self, name_or_id, bg=False):
+	__slots__ = ()
+
+	def __new__(cls, name_or_id, bg=False):
 		if name_or_id in range(0, 16):
-			self.id = name_or_id
+			id = name_or_id
 		else:
 			try:
 				id = NamedColor.name_to_id(name_or_id)
 			except ValueError:
 				raise ValueError("name_or_id must be an integer ID in [0, 15] "
 					+ "or a color name.")
-			self.id = id
-		self._bg = bg
+		return cls._from_value(id | _BG_BIT if bg else id)
+
+	def __repr__(self):
+		return "NamedColor({}{})".format(self.id, ", bg=True" if self._bg else "")
+
+	@property
+	def id(self):
+		return self._value & 0xFF
+
+	@property
+	def r(self):
+		return self._palette()[0]
+
+	@property
+	def g(self):
+		return self._palette()[1]
+
+	@property
+	def b(self):
+		return self._palette()[2]
+
+	def _palette(self):
+		"""Look up the xterm default value of this color.
+		"""
+		id = self.id
+		return quantize.PALETTE_16[id - 52 if id >= 60 else id]
 
 	@staticmethod
 	def name_to_id(name):
@@ -158,4 +217,10 @@ class NamedColor(Color):
 		return self.ansi_16(**kwargs)
 
 	def ansi_rgb(self, **kwargs):
-		return self.ansi_16(**kwargs)
\ No newline at end of file
+		return self.ansi_16(**kwargs)
+
+def _clear_escapes(cls=Color):
+	cls._escapes.clear()
+	for sub in cls.__subclasses__():
+		_clear_escapes(sub)
+quantize.on_metric_change.append(_clear_escapes)
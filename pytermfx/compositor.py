@@ -0,0 +1,271 @@
+from pytermfx.screen import ScreenBuffer, text_cells
+from pytermfx.style import Style
+from pytermfx.width import width
+
+# more dirty rectangles than this are merged into their bounding box
+MAX_DIRTY_RECTS = 32
+
+class Layer:
+    """A sheet of cells that a Compositor stacks with other layers.
+    Cells are transparent until something is drawn in them, and a cell drawn
+    without a background color shows the background of the layers below.
+    Coordinates are relative to the layer's own top left corner, which is at
+    (x, y) on the screen. Every change marks the area it touched as dirty,
+    and only dirty areas are composited.
+    """
+    def __init__(self, compositor, z=0, x=0, y=0, w=None, h=None):
+        self.compositor = compositor
+        self.z = z
+        self.x = int(x)
+        self.y = int(y)
+        self._fixed_size = (w, h)
+        self.visible = True
+        self.w = 0
+        self.h = 0
+        self.resize()
+
+    def resize(self):
+        """Match the layer to the size of the terminal, unless it was given
+        a size of its own. The layer is cleared.
+        """
+        w, h = self._fixed_size
+        t = self.compositor.terminal
+        self.w = t.w if w is None else int(w)
+        self.h = t.h if h is None else int(h)
+        self._cells = [[None] * self.w for _ in range(self.h)]
+        self._mark(0, 0, self.w, self.h)
+
+    def _mark(self, x, y, w, h):
+        if self.visible:
+            self.compositor.mark_dirty(self.x + x, self.y + y, w, h)
+
+    def put(self, x, y, ch, fg=None, bg=None, style=None):
+        """Set a single cell. Cells outside of the layer are ignored.
+        """
+        x = int(x)
+        y = int(y)
+        if x < 0 or y < 0 or x >= self.w or y >= self.h:
+            return self
+        if not ch.isascii():
+            return self.write(x, y, ch, fg, bg, style)
+        if style == Style.none:
+            style = None
+        self._cells[y][x] = (ch, fg, bg, style)
+        self._mark(x, y, 1, 1)
+        return self
+
+    def get(self, x, y):
+        """Retrieve the (ch, fg, bg, style) tuple of a cell, or None if it
+        is transparent.
+        """
+        return self._cells[int(y)][int(x)]
+
+    def write(self, x, y, text, fg=None, bg=None, style=None):
+        """Write a string starting at (x, y), clipped to the layer.
+        """
+        x = int(x)
+        y = int(y)
+        if y < 0 or y >= self.h:
+            return self
+        if not text.isascii():
+            text = text_cells(text)
+        start = max(0, -x)
+        end = min(len(text), self.w - x)
+        if start >= end:
+            return self
+        if style == Style.none:
+            style = None
+        self._cells[y][x + start:x + end] = [(ch, fg, bg, style)
+                                             for ch in text[start:end]]
+        self._mark(x + start, y, end - start, 1)
+        return self
+
+    def fill(self, x, y, w, h, ch=" ", fg=None, bg=None, style=None):
+        """Fill a region with one cell.
+        """
+        if style == Style.none:
+            style = None
+        return self._set_region(x, y, w, h, (ch, fg, bg, style))
+
+    def erase(self, x, y, w, h):
+        """Make a region transparent again.
+        """
+        return self._set_region(x, y, w, h, None)
+
+    def clear(self):
+        """Make the whole layer transparent.
+        """
+        return self.erase(0, 0, self.w, self.h)
+
+    def _set_region(self, x, y, w, h, cell):
+        x0 = max(int(x), 0)
+        x1 = min(int(x + w), self.w)
+        y0 = max(int(y), 0)
+        y1 = min(int(y + h), self.h)
+        if x0 >= x1 or y0 >= y1:
+            return self
+        cells = [cell] * (x1 - x0)
+        for row in range(y0, y1):
+            self._cells[row][x0:x1] = cells
+        self._mark(x0, y0, x1 - x0, y1 - y0)
+        return self
+
+    def move(self, x, y):
+        """Move the layer so that its top left corner is at (x, y).
+        """
+        self._mark(0, 0, self.w, self.h)
+        self.x = int(x)
+        self.y = int(y)
+        self._mark(0, 0, self.w, self.h)
+        return self
+
+    def set_z(self, z):
+        """Change the order of the layer: higher layers cover lower ones.
+        """
+        self.z = z
+        self.compositor._sort()
+        self._mark(0, 0, self.w, self.h)
+        return self
+
+    def set_visible(self, visible):
+        """Show or hide the layer.
+        """
+        if visible != self.visible:
+            self.visible = visible
+            self.compositor.mark_dirty(self.x, self.y, self.w, self.h)
+        return self
+
+class Compositor:
+    """Stacks layers on top of a ScreenBuffer.
+    Create layers with layer(), draw into them, then call present() to
+    combine the areas that changed and send the cells that differ to the
+    terminal:
+        comp = Compositor(terminal)
+        scene = comp.layer(z=0)
+        hud = comp.layer(z=1, x=1, y=1, w=20, h=2)
+        hud.write(0, 0, "Q to quit", NamedColor("white"))
+        ...
+        scene.put(x, y, "@", fg)
+        comp.present()
+    """
+    def __init__(self, terminal):
+        self.terminal = terminal
+        self.screen = ScreenBuffer(terminal)
+        self.layers = []
+        self._dirty = []
+        terminal.add_resize_handler(self.resize)
+
+    def layer(self, z=0, x=0, y=0, w=None, h=None):
+        """Add a new layer. With no size, the layer covers the terminal and
+        follows its size.
+        """
+        layer = Layer(self, z, x, y, w, h)
+        self.layers.append(layer)
+        self._sort()
+        return layer
+
+    def remove(self, layer):
+        """Take a layer off of the screen.
+        """
+        self.layers.remove(layer)
+        self.mark_dirty(layer.x, layer.y, layer.w, layer.h)
+        return self
+
+    def _sort(self):
+        # stable, so layers with equal z stay in the order they were added
+        self.layers.sort(key=lambda layer: layer.z)
+
+    def resize(self):
+        """Resize the layers that follow the terminal and redraw everything.
+        """
+        for layer in self.layers:
+            if None in layer._fixed_size:
+                layer.resize()
+        self._dirty = []
+        self.mark_dirty(0, 0, self.screen.w, self.screen.h)
+
+    def mark_dirty(self, x, y, w, h):
+        """Mark an area of the screen to be composited again.
+        """
+        x0 = max(int(x), 0)
+        y0 = max(int(y), 0)
+        x1 = min(int(x + w), self.screen.w)
+        y1 = min(int(y + h), self.screen.h)
+        if x0 >= x1 or y0 >= y1:
+            return self
+        dirty = self._dirty
+        # merge with a rectangle that already covers or touches this one
+        for i, (dx0, dy0, dx1, dy1) in enumerate(dirty):
+            if dx0 <= x0 and dy0 <= y0 and x1 <= dx1 and y1 <= dy1:
+                return self
+            if x0 <= dx1 and dx0 <= x1 and y0 <= dy1 and dy0 <= y1:
+                del dirty[i]
+                return self.mark_dirty(min(x0, dx0), min(y0, dy0),
+                                       max(x1, dx1) - min(x0, dx0),
+                                       max(y1, dy1) - min(y0, dy0))
+        dirty.append((x0, y0, x1, y1))
+        if len(dirty) > MAX_DIRTY_RECTS:
+            self._dirty = [(min(r[0] for r in dirty), min(r[1] for r in dirty),
+                            max(r[2] for r in dirty), max(r[3] for r in dirty))]
+        return self
+
+    def dirty_rects(self):
+        """List the dirty areas as (x0, y0, x1, y1) rectangles.
+        """
+        return list(self._dirty)
+
+    def compose(self):
+        """Combine the layers into the screen buffer where they are dirty.
+        """
+        screen = self.screen
+        layers = [layer for layer in reversed(self.layers) if layer.visible]
+        for x0, y0, x1, y1 in self._dirty:
+            for y in range(y0, y1):
+                # the rows of the layers that cover this row, top first
+                rows = [(layer._cells[y - layer.y], layer.x, layer.w)
+                        for layer in layers if 0 <= y - layer.y < layer.h]
+                chars = screen._chars[y]
+                fgs = screen._fg[y]
+                bgs = screen._bg[y]
+                styles = screen._styles[y]
+                for x in range(x0, x1):
+                    top = None
+                    bg = None
+                    for cells, lx, lw in rows:
+                        if 0 <= x - lx < lw:
+                            cell = cells[x - lx]
+                            if cell is None:
+                                continue
+                            if top is None:
+                                top = cell
+                            bg = cell[2]
+                            if bg is not None:
+                                break
+                    if top is None:
+                        chars[x] = " "
+                        fgs[x] = bgs[x] = styles[x] = None
+                    else:
+                        chars[x], fgs[x], _, styles[x] = top
+                        bgs[x] = bg
+                self._fix_wide(chars, x0, x1)
+        self._dirty = []
+        return self
+
+    def _fix_wide(self, chars, x0, x1):
+        # a layer may cover half of a wide character from a layer below;
+        # the half that is left becomes a blank
+        for x in range(max(x0 - 1, 0), min(x1 + 1, len(chars))):
+            ch = chars[x]
+            if ch == "":
+                if x == 0 or width(chars[x - 1]) != 2:
+                    chars[x] = " "
+            elif not ch.isascii() and width(ch) == 2:
+                if x + 1 == len(chars) or chars[x + 1] != "":
+                    chars[x] = " "
+
+    def present(self, flush=True):
+        """Composite the dirty areas and send the changes to the terminal.
+        """
+        self.compose()
+        self.screen.present(flush)
+        return self
@@ -8,6 +8,12 @@ It supports most of the keys I have on my keyboard.
 
 KEY_MAP = {}
 SEQ_LIST = []  # list of (sequence, key) tuples
+SEQ_MAP = {}   # sequence -> key or parser
+SEQ_PARSERS = {}  # sequence prefix -> parser, like "[M" for mouse reports
+_parser_prefix_len = 0  # length of the longest prefix in SEQ_PARSERS
+
+# xterm modifier parameter (CSI 1;<m>A) is 1 + a bit set of these
+_MODIFIER_BITS = ((1, "shift"), (2, "alt"), (4, "ctrl"))
 
 class UnknownEscape(Exception):
     pass
@@ -24,7 +30,26 @@ def parse_mouse(seq):
     up = not moved and not (left or right)
     x = ord(seq[1]) - 33
     y = ord(seq[2]) - 33
-    return 3, MouseEvent(x, y, left=left, right=right, down=down, up=up, btns=btns)
+    return 3, MouseEvent(x, y, left=left, right=right, down=down, up=up,
+                         btns=btns, moved=bool(moved))
+
+def parse_mouse_sgr(seq):
+    """Parse an SGR (1006) or SGR-pixels (1016) mouse report: "b;x;yM" for
+    presses and motion, "b;x;ym" for releases.
+    """
+    try:
+        btns, x, y = (int(n) for n in seq[:-1].split(";"))
+    except ValueError:
+        raise UnknownEscape("Malformed mouse sequence: {}".format(seq))
+    release = seq[-1] == "m"
+    wheel = btns & 0b1000000
+    left = not wheel and btns & 0b11 == 0b00
+    right = not wheel and btns & 0b11 == 0b10
+    moved = bool(btns & 0b100000)
+    down = not moved and not release and (left or right)
+    up = release
+    return len(seq), MouseEvent(x - 1, y - 1, left=left, right=right,
+                                down=down, up=up, btns=btns, moved=moved)
 
 def parse_esc_key(seq):
     if len(seq) > 1:
@@ -32,60 +57,186 @@ def parse_esc_key(seq):
         return len(seq), None
     return 1, KEY_ESC
 
-def parse_escape(seq, allow_unknown_escapes = True):
-    """Parses an escape sequence.
+def escape_end(s, i):
+    """Find the end of the escape sequence that starts at s[i].
+    Returns None if the sequence is incomplete.
     """
-    seq_key = sorted(SEQ_LIST, key=lambda tup: len(tup[0]), reverse=True)
-    try:
-        while len(seq) > 0:
+    n = len(s)
+    if i + 1 >= n:
+        return None
+    kind = s[i + 1]
+    if kind == "[":
+        # control sequence
+        j = i + 2
+        if j < n and s[j] == "M":
+            # legacy mouse report: CSI M followed by 3 characters
+            return j + 4 if j + 4 <= n else None
+        private = j < n and s[j] == "?"
+        while j < n:
+            ch = s[j]
+            if ch == "$" and not private:
+                # rxvt terminates shifted keys with $
+                return j + 1
+            if "\x40" <= ch <= "\x7e":
+                return j + 1
+            if not "\x20" <= ch <= "\x3f":
+                # malformed; end before the unexpected character
+                return j
+            j += 1
+        return None
+    if kind == "O":
+        # SS3 sequence
+        return i + 3 if i + 3 <= n else None
+    if kind == ESC:
+        return i + 1
+    # alt+key
+    return i + 2
+
+_modified = {}
+def _with_modifiers(key, param):
+    """Apply an xterm modifier parameter to a key.
+    """
+    result = _modified.get((key, param))
+    if result is None:
+        bits = int(param) - 1 if param.isdigit() else 0
+        mod = Mod(**{name: bool(bits & bit) for bit, name in _MODIFIER_BITS})
+        result = key + mod
+        _modified[(key, param)] = result
+    return result
+
+def _parse_generic(seq):
+    """Parse a control sequence with parameters, like "[1;5A" or "[3;2~",
+    by looking up its unmodified form and applying the modifiers.
+    Returns None if the sequence is not recognized.
+    """
+    kind = seq[0]
+    if kind not in "[O" or len(seq) < 2:
+        return None
+    final = seq[-1]
+    params = seq[1:-1].split(";")
+    if final == "~":
+        base = SEQ_MAP.get("[" + params[0] + "~")
+        if base is None:
+            base = _TILDE_KEYS.get(params[0])
+    else:
+        base = SEQ_MAP.get(kind + final)
+        if base is None and kind == "O":
+            base = SEQ_MAP.get("[" + final)
+        elif base is None and params[0] == "1":
+            # modified F1-F4 arrive as "[1;5P", but unmodified as "OP"
+            base = SEQ_MAP.get("O" + final)
+    if not isinstance(base, Key):
+        return None
+    if len(params) > 1:
+        return _with_modifiers(base, params[1])
+    return base
+
+def _parse_sequence(seq):
+    """Parse one complete escape sequence (without the leading ESC).
+    Returns a key or event, or None if it produced nothing.
+    Raises UnknownEscape if the sequence is not recognized.
+    """
+    if seq == "":
+        return KEY_ESC
+
+    # exact registered sequence
+    val = SEQ_MAP.get(seq)
+    if isinstance(val, Key):
+        return val
+
+    # longest registered prefix with a parser, like "[M" for mouse reports
+    for n in range(min(len(seq), _parser_prefix_len), 0, -1):
+        parser = SEQ_PARSERS.get(seq[:n])
+        if parser is not None:
+            return parser(seq[n:])[1]
+
+    # control sequence with parameters
+    key = _parse_generic(seq)
+    if key is not None:
+        return key
+
+    # special case for alt+key
+    if len(seq) == 1:
+        if seq in KEY_MAP:
+            return KEY_MAP[seq] + MOD_ALT
+        return Key(seq, alt=True)
+
+    raise UnknownEscape("Unknown sequence: {}".format(seq))
+
+class EscapeParser:
+    """Incrementally parses input into keys and mouse events.
+    Input may be fed in arbitrary chunks; an escape sequence that is split
+    across chunks is kept until the rest arrives or flush() is called.
+    """
+    def __init__(self, allow_unknown_escapes = True):
+        self.allow_unknown_escapes = allow_unknown_escapes
+        self._tail = ""
+
+    def pending(self):
+        """Check whether an incomplete escape sequence is buffered.
+        """
+        return len(self._tail) > 0
+
+    def feed(self, s, final = False):
+        """Parse a chunk of input and return a list of complete keys.
+        If final is set, any incomplete escape sequence at the end is
+        parsed as-is instead of being kept for the next chunk.
+        """
+        if self._tail:
+            s = self._tail + s
+            self._tail = ""
+        result = []
+        append = result.append
+        n = len(s)
+        i = 0
+        while i < n:
             # oh look: an ASCII (unicode) character
-            first = seq[0]
+            first = s[i]
             if first != ESC:
-                if first in KEY_MAP:
-                    yield KEY_MAP[first]
-                else:
-                    yield Key(first)
-                seq = seq[1:]
+                key = KEY_MAP.get(first)
+                append(key if key is not None else Key(first))
+                i += 1
                 continue
-            
-            # special case for alt+key
-            # does not currently support all alt+key combos
-            if len(seq) == 2:
-                # note that this will fail to detect alt+key for simultaneous
-                # keypresses, but I don't think we can solve this.
-                key = seq[1]
-                if ord(key) < 127:
-                    if key in KEY_MAP:
-                        yield KEY_MAP[key] + MOD_ALT
-                    else:
-                        yield Key(key, alt=True)
-                    break
-            
+
             # an escape sequence
-            seq = seq[1:] # strip ESC
-            for candidate_seq, val in seq_key:
-                if seq.startswith(candidate_seq):
-                    seq = seq[len(candidate_seq):]
-                    if isinstance(val, Key):
-                        yield val
-                    elif callable(val):
-                        n_remove, result = val(seq)
-                        seq = seq[n_remove:]
-                        if result is not None:
-                            yield result
+            end = escape_end(s, i)
+            if end is None:
+                if not final:
+                    self._tail = s[i:]
                     break
-            else:
-                raise UnknownEscape("Unknown sequence: {}".format(seq))
-    except UnknownEscape:
-        if not allow_unknown_escapes:
-            # unrecognized sequence
-            raise
+                end = n
+            try:
+                key = _parse_sequence(s[i+1:end])
+                if key is not None:
+                    append(key)
+            except UnknownEscape:
+                if not self.allow_unknown_escapes:
+                    # unrecognized sequence
+                    raise
+            i = end
+        return result
+
+    def flush(self):
+        """Parse any incomplete escape sequence that is still buffered.
+        """
+        return self.feed("", final = True)
+
+def parse_escape(seq, allow_unknown_escapes = True):
+    """Parses a string of input that may contain escape sequences.
+    """
+    yield from EscapeParser(allow_unknown_escapes).feed(seq, final = True)
 
 def register_seq(*seq, val):
-    """Register an escape sequence and corresponding Key
+    """Register an escape sequence and corresponding Key, or a parser for
+    the sequences that start with it
     """
+    global _parser_prefix_len
     for s in seq:
         SEQ_LIST.append((s, val))
+        SEQ_MAP[s] = val
+        if callable(val) and s:
+            SEQ_PARSERS[s] = val
+            _parser_prefix_len = max(_parser_prefix_len, len(s))
 
 
 def register_seq_mods(*seq, val):
@@ -109,6 +260,7 @@ KEY_MAP[chr(13)] = KEY_ENTER
 # Register escape sequences
 # Misc
 register_seq("[M", val = parse_mouse)
+register_seq("[<", val = parse_mouse_sgr)
 register_seq("[Z", val = KEY_TAB + MOD_SHIFT)
 register_seq("", val = parse_esc_key)
 
@@ -153,3 +305,6 @@ register_seq("[H", val = KEY_PGUP)
 register_seq("[F", val = KEY_PGDN)
 register_seq_mods("[7", val = KEY_HOME)
 register_seq_mods("[8", val = KEY_END)
+
+# CSI n~ keys that only appear with modifiers
+_TILDE_KEYS = {"1": KEY_HOME, "4": KEY_END}
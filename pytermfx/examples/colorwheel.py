@@ -17,7 +17,7 @@ def main():
 			if c == "q":
 				break
 			elif c == "r":
-				if t._color_mode == ColorMode.MODE_RGB:
+				if t.get_color_mode() == ColorMode.MODE_RGB:
 					t.set_color_mode(ColorMode.MODE_256)
 				else:
 					t.set_color_mode(ColorMode.MODE_RGB)
@@ -1,5 +1,6 @@
 from pytermfx import Terminal, Color, NamedColor, Style
 from pytermfx.tools import TerminalApp
+from pytermfx.keymap import Keymap
 
 t = Terminal()
 t.cursor_set_visible(False)
@@ -42,28 +43,25 @@ def update():
 	t.style_reset()
 	t.flush()
 
-def on_input(char):
-	global app, scale, off_x, off_y
-	if char == "q":
-		app.stop(lambda: t.clear())
-		return
+def zoom(factor):
+	global scale
+	scale *= factor
+	app.update()
 
-	# zoom
-	if char == "-":
-		scale *= 1.1
-	elif char == "=":
-		scale /= 1.1
-	
-	# movement
-	if char == "w":
-		off_y -= STEP * scale
-	elif char == "s":
-		off_y += STEP * scale
-	elif char == "d":
-		off_x += STEP * scale
-	elif char == "a":
-		off_x -= STEP * scale
+def move(dx, dy):
+	global off_x, off_y
+	off_x += dx * STEP * scale
+	off_y += dy * STEP * scale
 	app.update()
 
-app = TerminalApp(t, 0, update = update, on_input = on_input)
+keymap = Keymap()
+keymap.bind("q", lambda: app.stop(lambda: t.clear()))
+keymap.bind("-", lambda: zoom(1.1))
+keymap.bind("=", lambda: zoom(1 / 1.1))
+keymap.bind("w", lambda: move(0, -1))
+keymap.bind("s", lambda: move(0, 1))
+keymap.bind("a", lambda: move(-1, 0))
+keymap.bind("d", lambda: move(1, 0))
+
+app = TerminalApp(t, 0, update = update, keymap = keymap)
 app.start()
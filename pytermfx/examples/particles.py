@@ -1,4 +1,5 @@
-from pytermfx import Terminal, Color, Style
+from pytermfx import Terminal, Color
+from pytermfx.particles import ParticleSystem
 from pytermfx.tools import TerminalApp
 from pytermfx.keys import MouseEvent
 import random
@@ -8,27 +9,21 @@ mouse_x = 0
 mouse_y = 0
 mouse_px = 0
 mouse_py = 0
-particles = []
+emitted = 0
 t = Terminal()
 t.cursor_set_visible(False)
 t.set_cbreak(True)
 t.mouse_enable("move")
 t.style(Color.hex(0)).clear()
+particles = ParticleSystem(gravity = (0, 0.1))
 
-class Particle:
-	def __init__(self, x, y, vx = 0, vy = 0):
-		self.x = x
-		self.y = y
-		self.vx = vx
-		self.vy = vy
-
-	def update(self):
-		self.x += self.vx
-		self.y += self.vy
-		self.vy += 0.1
+def resize():
+	particles.bounds = (0, 0, t.w, t.h)
+t.add_resize_handler(resize)
+resize()
 
 def update():
-	global t, mouse_x, mouse_y, mouse_px, mouse_py
+	global t, mouse_x, mouse_y, mouse_px, mouse_py, emitted
 	dx = mouse_x - mouse_px
 	dy = mouse_y - mouse_py
 	l = math.sqrt(dx ** 2 + dy ** 2)
@@ -41,17 +36,12 @@ def update():
 		dd = d + random.uniform(-0.2, 0.2)
 		vx = ll * math.cos(dd)
 		vy = ll * math.sin(dd)
-		particles.append(Particle(mouse_px + dx * f, mouse_py + dy * f, vx, vy))
+		particles.emit(mouse_px + dx * f, mouse_py + dy * f, vx, vy, color = emitted)
+		emitted += 1
 
-	for i, p in enumerate(particles):
-		t.cursor_to(int(p.x), int(p.y))
-		t.style(Style.none).write(" ")
-		p.update()
-		if p.x < 0 or p.y < 0 or p.x >= t.w or p.y >= t.h:
-			particles.remove(p)
-		else:
-			t.cursor_to(int(p.x), int(p.y))
-			t.style(Color.hsl(i/len(particles), 1.0, 0.5)).write("@")
+	# moves every particle at once, then draws each occupied cell once
+	particles.update()
+	particles.draw(t)
 	t.flush()
 
 	mouse_px = mouse_x
@@ -66,4 +56,4 @@ def on_input(c):
 		mouse_y = c.y
 
 app = TerminalApp(t, 30, update = update, on_input = on_input)
-app.start()
\ No newline at end of file
+app.start()
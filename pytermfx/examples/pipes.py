@@ -1,5 +1,6 @@
 from pytermfx import Terminal, Color
 from pytermfx.tools import TerminalApp
+from pytermfx.keymap import Keymap
 from random import random, randint, choice
 from time import sleep
 
@@ -104,10 +105,9 @@ def update():
 	t.flush()
 
 def main():
-	def on_input(c):
-		if c == "q":
-			app.stop()
-	app = TerminalApp(t, 60, update=update, on_input=on_input)
+	keymap = Keymap()
+	keymap.bind("q", lambda: app.stop())
+	app = TerminalApp(t, 60, update=update, keymap=keymap)
 	app.start()
 	
 main()
\ No newline at end of file
@@ -0,0 +1,218 @@
+"""Key bindings: map keys and chords of keys to handlers.
+Bindings are compiled into a trie of dicts keyed by Key objects, so each
+key is dispatched with one dict lookup:
+    keymap = Keymap()
+    keymap.bind("q", app.stop)
+    keymap.bind("ctrl+x ctrl+s", save)
+    keymap.bind("i", lambda: keymap.set_mode("insert"))
+    keymap.bind("escape", lambda: keymap.set_mode(None), mode="insert")
+    ...
+    if not keymap.dispatch(terminal.getch()):
+        ...
+"""
+
+from pytermfx.keys import *
+from pytermfx.escapes import KEY_MAP
+import time
+
+# keys that a spec may name
+NAMED_KEYS = {
+    "up": KEY_UP,
+    "down": KEY_DOWN,
+    "right": KEY_RIGHT,
+    "left": KEY_LEFT,
+    "tab": KEY_TAB,
+    "backspace": KEY_BACKSPACE,
+    "enter": KEY_ENTER,
+    "escape": KEY_ESC,
+    "esc": KEY_ESC,
+    "insert": KEY_INS,
+    "delete": KEY_DEL,
+    "home": KEY_HOME,
+    "end": KEY_END,
+    "pageup": KEY_PGUP,
+    "pagedown": KEY_PGDN,
+    "space": Key(" ")}
+NAMED_KEYS.update({"f{}".format(i + 1): Key(name="f{}".format(i + 1))
+                   for i in range(12)})
+
+_MODIFIERS = {
+    "ctrl": MOD_CTRL,
+    "alt": MOD_ALT,
+    "meta": MOD_ALT,
+    "shift": MOD_SHIFT}
+
+def parse_key(spec):
+    """Convert a key spec like "q", "Q", "up", "ctrl+c" or "alt+shift+left"
+    into the Key that input parsing produces for it.
+    Terminals send ctrl+h, ctrl+i, ctrl+j and ctrl+m as backspace, tab,
+    enter and enter, so those specs raise ValueError; bind the key they
+    arrive as instead.
+    """
+    if isinstance(spec, Key):
+        return spec
+    parts = spec.split("+")
+    if spec.endswith("+"):
+        # the + key itself
+        parts = parts[:-2] + ["+"]
+    name = parts[-1]
+    mod = MOD_NONE
+    for part in parts[:-1]:
+        try:
+            mod = mod + _MODIFIERS[part.lower()]
+        except KeyError:
+            raise ValueError("Unknown modifier {!r} in key spec {!r}".format(part, spec))
+    if len(name) == 1:
+        if mod.ctrl and name.isalpha():
+            # ctrl+i, ctrl+m, ... are sent as the same byte as another key
+            sent = KEY_MAP[chr(ord(name.lower()) - ord("a") + 1)]
+            if sent.name != name.lower():
+                raise ValueError("{!r} arrives as {!r}; bind that instead.".format(
+                    spec, sent.name))
+        if mod.shift and name.isalpha():
+            # shift+a arrives as "A"
+            name = name.upper()
+            mod = Mod(ctrl=mod.ctrl, alt=mod.alt)
+        key = Key(name)
+    else:
+        key = NAMED_KEYS.get(name.lower())
+        if key is None:
+            raise ValueError("Unknown key {!r} in key spec {!r}".format(name, spec))
+        if mod.ctrl and key == NAMED_KEYS["space"]:
+            # ctrl+space arrives as a NUL character
+            key = Key(0)
+            mod = Mod(alt=mod.alt, shift=mod.shift)
+    return key + mod
+
+def parse_chord(spec):
+    """Convert a chord spec into a tuple of Keys. A chord is a string of key
+    specs separated by spaces, like "ctrl+x ctrl+s", a single Key, or a
+    sequence of key specs.
+    """
+    if isinstance(spec, Key):
+        return (spec,)
+    if isinstance(spec, str):
+        spec = spec.split()
+    chord = tuple(parse_key(s) for s in spec)
+    if not chord:
+        raise ValueError("Empty key spec.")
+    return chord
+
+class Keymap:
+    """Dispatches keys to handlers bound to keys and chords.
+    Bindings belong to a mode; bindings without a mode apply in every mode,
+    unless the active mode binds the same keys. Binding a chord replaces a
+    binding of its first keys, and the other way around. A chord that is
+    left unfinished for longer than timeout seconds is abandoned.
+    Handlers are called without arguments.
+    """
+    def __init__(self, timeout=1.0, clock=time.monotonic):
+        self.timeout = timeout
+        self.clock = clock
+        self.mode = None
+        self._bindings = {}    # mode -> {chord: handler}
+        self._compiled = {}    # mode -> trie
+        self._node = None      # trie node of the pending chord
+        self._pending = ()
+        self._deadline = None
+
+    def bind(self, spec, handler=None, mode=None):
+        """Bind a key or chord to a handler. Without a handler, returns a
+        decorator:
+            @keymap.bind("ctrl+s")
+            def save(): ...
+        """
+        if handler is None:
+            def decorator(func):
+                self.bind(spec, func, mode)
+                return func
+            return decorator
+        chord = parse_chord(spec)
+        self._bindings.setdefault(mode, {})[chord] = handler
+        self._invalidate()
+        return handler
+
+    def unbind(self, spec, mode=None):
+        """Remove a binding.
+        """
+        del self._bindings.get(mode, {})[parse_chord(spec)]
+        self._invalidate()
+
+    def _invalidate(self):
+        self._compiled = {}
+        self.cancel()
+
+    def set_mode(self, mode):
+        """Switch to the bindings of another mode (None for the default).
+        Any pending chord is abandoned.
+        """
+        self.mode = mode
+        self.cancel()
+        return self
+
+    def _trie(self, mode):
+        trie = self._compiled.get(mode)
+        if trie is None:
+            trie = {}
+            layers = [self._bindings.get(None, {})]
+            if mode is not None:
+                layers.append(self._bindings.get(mode, {}))
+            # later layers (the mode's own bindings) replace earlier ones
+            for bindings in layers:
+                for chord, handler in bindings.items():
+                    node = trie
+                    for key in chord[:-1]:
+                        child = node.get(key)
+                        if not isinstance(child, dict):
+                            child = node[key] = {}
+                        node = child
+                    node[chord[-1]] = handler
+            self._compiled[mode] = trie
+        return trie
+
+    @property
+    def pending(self):
+        """The keys of the chord that is waiting for its next key.
+        """
+        self._check_timeout()
+        return self._pending
+
+    def cancel(self):
+        """Abandon the pending chord, if any.
+        """
+        self._node = None
+        self._pending = ()
+        self._deadline = None
+
+    def _check_timeout(self):
+        if self._deadline is not None and self.clock() > self._deadline:
+            self.cancel()
+
+    def dispatch(self, key):
+        """Handle a key. Returns True if it ran a handler or continued a
+        chord, and False if nothing is bound to it (including mouse events
+        and other non-keys).
+        """
+        if not isinstance(key, Key):
+            return False
+        self._check_timeout()
+        node = self._node
+        if node is None:
+            node = self._trie(self.mode)
+        target = node.get(key)
+        if target is None and self._node is not None:
+            # the chord is broken; try the key on its own
+            self.cancel()
+            node = self._trie(self.mode)
+            target = node.get(key)
+        if target is None:
+            return False
+        if isinstance(target, dict):
+            self._node = target
+            self._pending += (key,)
+            if self.timeout is not None:
+                self._deadline = self.clock() + self.timeout
+            return True
+        self.cancel()
+        target()
+        return True
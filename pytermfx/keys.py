@@ -1,74 +1,111 @@
-import unicodedata
-from numbers import Number
+def _is_control(code):
+	# same as unicodedata.category(chr(code)) == "Cc"
+	return code < 0x20 or 0x7f <= code < 0xa0
+
+# largest number of entries kept in the intern table
+INTERN_LIMIT = 1 << 12
+
+# Keys, by their constructor arguments and by (code, name, ctrl, alt, shift,
+# printable); AliasedKeys, by their keys
+_interned = {}
+# every Mod, by (ctrl, alt, shift)
+_mods = {}
 
 class Key:
 	"""Represents a key and its modifiers.
+	Keys are interned: constructing the same key twice usually returns the
+	same object, so keys must not be modified. A key compares equal to its
+	name (for printable keys, the character itself) and hashes like it, so
+	keys and names can be mixed as dict keys. A control key without a name
+	compares equal to and hashes like its character.
 	"""
-	def __init__(self, code=None, name=None, *, ctrl=False, alt=False, shift=False, printable=None):
-		assert(code or name)
+	__slots__ = ("code", "name", "ctrl", "alt", "shift", "printable",
+	             "_id", "_hash")
+
+	def __new__(cls, code=None, name=None, *, ctrl=False, alt=False, shift=False, printable=None):
+		# fast path: the same arguments as before
+		args = (code, name, ctrl, alt, shift, printable)
+		key = _interned.get(args)
+		if key is not None:
+			return key
+
+		assert(code is not None or name)
 		# convert character to char code
 		if isinstance(code, str):
 			code = ord(code)
-		
+
 		# detect printability (non-control)
 		if printable == None:
-			printable = code and unicodedata.category(chr(code)) != "Cc"
-		self.printable = printable
+			printable = code is not None and not _is_control(code)
 
 		# automatically name printable keys
 		if name == None and printable:
 			name = chr(code)
-		self.name = name
 
-		self.code = code
-		self.ctrl = ctrl
-		self.alt = alt
-		
 		# detect shift key
-		if code:
-			self.shift = shift or chr(code).isupper()
-		else:
-			self.shift = shift
-	
+		if code is not None:
+			shift = shift or chr(code).isupper()
+
+		full = (code, name, bool(ctrl), bool(alt), bool(shift), bool(printable))
+		key = _interned.get(full)
+		if key is None:
+			key = object.__new__(cls)
+			key.code = code
+			key.name = name
+			key.ctrl = full[2]
+			key.alt = full[3]
+			key.shift = full[4]
+			key.printable = full[5]
+			key._id = full[:5]
+			key._hash = hash(name if name is not None else chr(code))
+			if len(_interned) >= INTERN_LIMIT:
+				_interned.clear()
+			_interned[full] = key
+		_interned[args] = key
+		return key
+
+	def __getnewargs_ex__(self):
+		return ((self.code, self.name), {"ctrl": self.ctrl, "alt": self.alt,
+		        "shift": self.shift, "printable": self.printable})
+
 	def is_printable(self):
 		return self.printable
 
 	def __hash__(self):
-		return hash((self.code, self.name, self.ctrl, self.alt, self.shift))
+		return self._hash
 
 	def __eq__(self, other):
+		if other is self:
+			return True
+		if isinstance(other, AliasedKeys):
+			return other == self
 		if isinstance(other, Key):
-			return (self.code == other.code and
-			        self.name == other.name and
-			        self.ctrl == other.ctrl and 
-			        self.alt == other.alt and
-			        self.shift == other.shift)
+			return self._id == other._id
 		elif isinstance(other, str):
 			if other == self.name:
 				return True
-			if len(other) == 1:
-				return Key(other) == self
+			if len(other) == 1 and _is_control(ord(other)):
+				# a printable character equals only keys with its name
+				return Key(other)._id == self._id
 			return False
 		elif isinstance(other, int):
 			return self == Key(other)
-		elif other == None:
-			return False
 		else:
 			return False
 
-	def __add__(self, other):
-		k = self.clone()
-		k += other
-		return k
+	def __ne__(self, other):
+		return not self == other
 
-	def __iadd__(self, other):
+	def __add__(self, other):
 		if not isinstance(other, Mod):
 			raise RuntimeError("Key add only supports Modifier type")
-		k = self.clone()
-		k.ctrl = self.ctrl or other.ctrl
-		k.alt = self.alt or other.alt
-		k.shift = self.shift or other.shift
-		return k
+		return Key(self.code, self.name,
+		           ctrl = self.ctrl or other.ctrl,
+		           alt = self.alt or other.alt,
+		           shift = self.shift or other.shift,
+		           printable = self.printable)
+
+	__iadd__ = __add__
 
 	def __str__(self):
 		if self.code:
@@ -83,34 +120,55 @@ class Key:
 			for k, n in zip(keys, names) if k))
 	
 	def clone(self):
-		return Key(self.code, self.name, ctrl = self.ctrl, alt = self.alt, shift = self.shift)
+		# keys are immutable
+		return self
 
 class AliasedKeys(Key):
 	"""Represents a single key that has multiple key codes.
 	For example: backspace and enter on Windows vs POSIX.
 	"""
-	def __init__(self, *keys, name=None, printable=False):
-		self.keys = []
-		self.printable = printable
-		for key in keys:
-			if not isinstance(key, Key):
-				key = Key(key, name=name)
-			self.keys.append(key)
-		self.name = name
-	
-	def __hash__(self):
-		return hash(hash(key) for key in self.keys)
-	
+	__slots__ = ("keys",)
+
+	def __new__(cls, *keys, name=None, printable=False):
+		keys = tuple(key if isinstance(key, Key) else Key(key, name=name)
+		             for key in keys)
+		full = (AliasedKeys, keys, name, printable)
+		alias = _interned.get(full)
+		if alias is None:
+			alias = object.__new__(cls)
+			alias.keys = keys
+			alias.name = name
+			alias.printable = printable
+			first = keys[0]
+			alias.code = first.code
+			alias.ctrl = first.ctrl
+			alias.alt = first.alt
+			alias.shift = first.shift
+			alias._id = full
+			alias._hash = hash(name) if name is not None else hash(first)
+			if len(_interned) >= INTERN_LIMIT:
+				_interned.clear()
+			_interned[full] = alias
+		return alias
+
+	def __getnewargs_ex__(self):
+		return (self.keys, {"name": self.name, "printable": self.printable})
+
 	def __eq__(self, other):
+		if other is self:
+			return True
 		if isinstance(other, str) and other == self.name:
 			return True
+		if isinstance(other, AliasedKeys):
+			return self._id == other._id
 		return any(key == other for key in self.keys)
-	
-	def __iadd__(self, other):
-		k = self.clone()
-		for key in k.keys:
-			key += other
-		return k
+
+	def __add__(self, other):
+		return AliasedKeys(*(key + other for key in self.keys),
+		                   name=self.name, printable=self.printable)
+
+	__iadd__ = __add__
+	__hash__ = Key.__hash__
 	
 	def __str__(self):
 		return self.name or self.keys[0].__str__()
@@ -118,25 +176,43 @@ class AliasedKeys(Key):
 	def __repr__(self):
 		return ", ".join(key.__repr__() for key in self.keys)
 
-	def clone(self):
-		return AliasedKeys(self.keys, name=self.name, printable=self.printable)
-
-class Mod(Key):
+class Mod:
 	"""Represents a modifier key.
 	"""
-	def __init__(self, ctrl=False, alt=False, shift=False):
-		self.key = None
-		self.ctrl = ctrl
-		self.alt = alt
-		self.shift = shift
+	__slots__ = ("ctrl", "alt", "shift")
+
+	def __new__(cls, ctrl=False, alt=False, shift=False):
+		full = (bool(ctrl), bool(alt), bool(shift))
+		mod = _mods.get(full)
+		if mod is None:
+			mod = object.__new__(cls)
+			mod.ctrl, mod.alt, mod.shift = full
+			_mods[full] = mod
+		return mod
+
+	def __getnewargs__(self):
+		return (self.ctrl, self.alt, self.shift)
+
+	def __add__(self, other):
+		return Mod(ctrl = self.ctrl or other.ctrl,
+		           alt = self.alt or other.alt,
+		           shift = self.shift or other.shift)
+
+	def __repr__(self):
+		keys = (self.ctrl, self.alt, self.shift)
+		names = ("ctrl", "alt", "shift")
+		return "Mod({})".format(", ".join(n for k, n in zip(keys, names) if k))
 
 	def clone(self):
-		return Mod(ctrl = self.ctrl, alt = self.alt, shift = self.shift)
+		return self
 
 class MouseEvent:
 	"""Represents a mouse event (click, move, drag, etc.)
 	"""
-	def __init__(self, x, y, *, left = False, right = False, down = False, up = False, btns = 0):
+	__slots__ = ("x", "y", "left", "right", "down", "up", "btns", "moved",
+	             "history")
+
+	def __init__(self, x, y, *, left = False, right = False, down = False, up = False, btns = 0, moved = False):
 		self.x = x
 		self.y = y
 		self.left = left
@@ -144,6 +220,8 @@ class MouseEvent:
 		self.down = down
 		self.up = up
 		self.btns = btns
+		self.moved = moved
+		self.history = None # earlier (x, y) positions of coalesced motion
 	
 	def is_printable(self):
 		return False
@@ -152,8 +230,8 @@ class MouseEvent:
 		return "mouse"
 
 	def __repr__(self):
-		keys = (self.x, self.y, self.left, self.right, self.down, self.up)
-		names = ("x", "y", "left", "right", "down", "up")
+		keys = (self.x, self.y, self.left, self.right, self.down, self.up, self.moved)
+		names = ("x", "y", "left", "right", "down", "up", "moved")
 		return "MouseEvent({})".format(", ".join(
 			"{}={}".format(n, repr(k)) 
 			for k, n in zip(keys, names) if k))
@@ -1,8 +1,11 @@
 """Parse and render markdown.
 """
 
-from pytermfx import Terminal, Style, NamedColor
+from pytermfx import Terminal, Style, NamedColor, Color
+from pytermfx.style import NoneStyle
+from pytermfx.width import width as _text_width, cells as _cells
 from collections import OrderedDict
+from functools import lru_cache
 import re
 
 tab_size = 2
@@ -135,6 +138,13 @@ _env_parsers = OrderedDict([
 	(_rc(r"\n"),                         _parse_newline)
 ])
 
+# All of the above in one regex, in the same order of priority, so that a
+# single search finds the next place where any of them matches.
+_token_parsers = list(_env_parsers.items())
+_token_re = _rc("|".join("(?P<t{}>{})".format(k, regex.pattern)
+                          for k, (regex, parser) in enumerate(_token_parsers)))
+_token_index = {"t{}".format(k): k for k in range(len(_token_parsers))}
+
 def render(terminal, s):
 	"""Parse and render a markdown string.
 	Accepts either a string with newlines, or a list of lines.
@@ -146,6 +156,7 @@ def render(terminal, s):
 		buf = "".join(s)
 
 	i = 0
+	n = len(buf)
 	active_env = {
 		"bold": False,
 		"italic": False,
@@ -154,17 +165,196 @@ def render(terminal, s):
 		"inline-code": False,
 		"header": 0}
 
-	while i < len(buf):
-		matched = False
-		for regex, parser in _env_parsers.items():
-			match = regex.match(buf, i)
-			if match:
-				matched = True
-				i = parser(terminal = terminal,
-				           match = match,
-				           active_env = active_env,
-				           i = i)
-				break
-		if not matched:
-			terminal.write(buf[i])
-			i += 1
\ No newline at end of file
+	search = _token_re.search
+	while i < n:
+		token = search(buf, i)
+		if token is None:
+			terminal.write(buf[i:])
+			break
+
+		# plain text up to the next token is written all at once
+		start = token.start()
+		if start > i:
+			terminal.write(buf[i:start])
+
+		# the parsers expect a match of their own regex
+		regex, parser = _token_parsers[_token_index[token.lastgroup]]
+		i = parser(terminal = terminal,
+		           match = regex.match(buf, start),
+		           active_env = active_env,
+		           i = start)
+
+# Layout: the output of render() recorded as styled spans, so that it can be
+# wrapped to a width and drawn again without parsing the document again.
+
+# number of parsed documents and of wrapped layouts kept
+CACHE_SIZE = 32
+
+_NO_PEN = (None, None, frozenset())
+
+@lru_cache(maxsize=256)
+def _pen_styles(pen):
+	"""Get the styles that set a terminal to a recorded pen.
+	"""
+	fg, bg, attrs = pen
+	styles = [Style.none]
+	if attrs:
+		style = Style()
+		style.styles = set(attrs)
+		styles.append(style)
+	styles += (c for c in (fg, bg) if c is not None)
+	return tuple(styles)
+
+class _SpanRecorder:
+	"""Stands in for a Terminal while rendering, recording the written
+	text as lines of (text, pen) spans.
+	"""
+	def __init__(self):
+		self.lines = [[]]
+		self.pen = _NO_PEN
+
+	def style(self, *styles):
+		fg, bg, attrs = self.pen
+		for style in styles:
+			if isinstance(style, Color):
+				if style._bg:
+					bg = style
+				else:
+					fg = style
+			elif isinstance(style, NoneStyle):
+				fg, bg, attrs = _NO_PEN
+			elif isinstance(style, Style):
+				attrs = attrs | style.styles
+		self.pen = (fg, bg, frozenset(attrs))
+		return self
+
+	def write(self, *things):
+		text = "".join(map(str, things))
+		parts = text.split("\n")
+		for k, part in enumerate(parts):
+			if k > 0:
+				self.lines.append([])
+			if part:
+				line = self.lines[-1]
+				if line and line[-1][1] == self.pen:
+					line[-1] = (line[-1][0] + part, self.pen)
+				else:
+					line.append((part, self.pen))
+		return self
+
+	def writeln(self, *things):
+		return self.write(*things, "\n")
+
+def _wrap_line(spans, cols):
+	"""Break a line of spans into lines no wider than cols cells, at
+	spaces where possible.
+	"""
+	lines = [[]]
+	col = 0
+	def put(text, pen):
+		line = lines[-1]
+		if line and line[-1][1] == pen:
+			line[-1] = (line[-1][0] + text, pen)
+		else:
+			line.append((text, pen))
+	for text, pen in spans:
+		for piece in re.findall(r"\S+|\s+", text):
+			w = _text_width(piece)
+			if col + w <= cols:
+				put(piece, pen)
+				col += w
+				continue
+			if piece.isspace():
+				# break the line here instead of writing the spaces
+				lines.append([])
+				col = 0
+				continue
+			if w <= cols and col > 0:
+				lines.append([])
+				put(piece, pen)
+				col = w
+				continue
+			# a word longer than the line is split anywhere
+			for g, gw in _cells(piece):
+				if col + gw > cols and col > 0:
+					lines.append([])
+					col = 0
+				put(g, pen)
+				col += gw
+	return lines
+
+class Layout:
+	"""Rendered markdown as lines of (text, pen) spans, optionally wrapped to
+	a width. Get one with layout() and draw it with draw().
+	"""
+	def __init__(self, lines, width=None):
+		self.lines = lines
+		self.width = width
+
+	@property
+	def height(self):
+		return len(self.lines)
+
+	def line_text(self, i):
+		return "".join(text for text, pen in self.lines[i])
+
+	def draw(self, terminal, x=None, y=None, start=0, count=None):
+		"""Write lines start to start+count (all by default) to a terminal.
+		Without a position, lines are written at the cursor, separated by
+		newlines. With a position, each line is drawn at its own row and
+		padded to the width of the layout, so that it covers whatever was
+		there before.
+		"""
+		end = len(self.lines) if count is None else min(len(self.lines), start + count)
+		for row in range(start, end):
+			if y is None:
+				if row > start:
+					terminal.write("\n")
+			else:
+				terminal.cursor_to(x or 0, y + row - start)
+			col = 0
+			for text, pen in self.lines[row]:
+				terminal.style(*_pen_styles(pen))
+				terminal.write(text)
+				col += _text_width(text)
+			if y is not None and self.width is not None and col < self.width:
+				terminal.style(Style.none)
+				terminal.write(" " * (self.width - col))
+		terminal.style(Style.none)
+		return self
+
+_parsed = OrderedDict()
+_wrapped = OrderedDict()
+
+def _cache_put(cache, key, value):
+	cache[key] = value
+	if len(cache) > CACHE_SIZE:
+		cache.popitem(last=False)
+
+def layout(s, width=None):
+	"""Lay out a markdown string (or list of lines), wrapped to width cells
+	if given. Results are cached by document and width: drawing the same
+	document again costs no parsing, and a new width only redoes the
+	wrapping.
+	"""
+	buf = s if isinstance(s, str) else "".join(s)
+	key = (buf, width)
+	result = _wrapped.get(key)
+	if result is not None:
+		_wrapped.move_to_end(key)
+		return result
+
+	lines = _parsed.get(buf)
+	if lines is None:
+		recorder = _SpanRecorder()
+		render(recorder, buf)
+		lines = recorder.lines
+		_cache_put(_parsed, buf, lines)
+	else:
+		_parsed.move_to_end(buf)
+
+	if width is not None:
+		lines = [wrapped for line in lines for wrapped in _wrap_line(line, width)]
+	result = Layout(lines, width)
+	_cache_put(_wrapped, key, result)
+	return result
@@ -0,0 +1,142 @@
+"""Opt-in measurements of the output sent to the terminal.
+Enable them with Terminal.set_metrics(sink), where sink is any callable that
+takes a FlushRecord, for example a MetricsRecorder.
+"""
+
+from collections import deque
+import re
+import time
+
+# escape sequences: CSI with parameters, or ESC and a single character
+_ESCAPE_RE = re.compile(r"\x1b(?:\[[0-?]*[ -/]*[@-~]|[^\[])")
+_CURSOR_FINALS = frozenset("ABCDEFGHIJKfdea`su")  # also counts erases
+_CURSOR_ESC = frozenset("78MDE")
+_CURSOR_CONTROLS = re.compile(r"[\r\n\b]")
+
+CATEGORIES = ("sgr", "cursor", "other", "text")
+
+def _size(s):
+    return len(s) if s.isascii() else len(s.encode("utf-8"))
+
+class FlushRecord:
+    """Measurements of a single flush.
+    bytes      - bytes written (UTF-8)
+    writes     - number of pieces of output that were buffered
+    escapes    - number of escape sequences
+    duration   - seconds spent writing the output
+    categories - bytes per category: "sgr" (colors and styles), "cursor"
+                 (cursor motion, erasing, and the \\r, \\n and \\b
+                 characters), "other" (remaining escapes) and "text"
+    """
+    __slots__ = ("time", "bytes", "writes", "escapes", "duration", "categories")
+
+    def __init__(self, time, bytes, writes, escapes, duration, categories):
+        self.time = time
+        self.bytes = bytes
+        self.writes = writes
+        self.escapes = escapes
+        self.duration = duration
+        self.categories = categories
+
+    @staticmethod
+    def measure(msg, writes, duration):
+        """Build the record for a flush that wrote msg.
+        """
+        categories = dict.fromkeys(CATEGORIES, 0)
+        escapes = 0
+        text = []
+        pos = 0
+        for match in _ESCAPE_RE.finditer(msg):
+            text.append(msg[pos:match.start()])
+            pos = match.end()
+            esc = match.group()
+            escapes += 1
+            if esc[1] == "[":
+                final = esc[-1]
+                if final == "m":
+                    categories["sgr"] += len(esc)
+                elif final in _CURSOR_FINALS:
+                    categories["cursor"] += len(esc)
+                else:
+                    categories["other"] += len(esc)
+            elif esc[1] in _CURSOR_ESC:
+                categories["cursor"] += len(esc)
+            else:
+                categories["other"] += len(esc)
+        text.append(msg[pos:])
+        text = "".join(text)
+        controls = len(_CURSOR_CONTROLS.findall(text))
+        categories["cursor"] += controls
+        categories["text"] = _size(text) - controls
+        return FlushRecord(time.time(), _size(msg), writes, escapes,
+                           duration, categories)
+
+    def __repr__(self):
+        return ("FlushRecord(bytes={}, writes={}, escapes={}, "
+                "duration={:.3f}ms, categories={})").format(self.bytes,
+                self.writes, self.escapes, self.duration * 1000, self.categories)
+
+class MetricsRecorder:
+    """A metrics sink that keeps totals and the most recent records.
+    """
+    def __init__(self, window=1000):
+        self.records = deque(maxlen=window)
+        self.reset()
+
+    def reset(self):
+        self.records.clear()
+        self.flushes = 0
+        self.bytes = 0
+        self.writes = 0
+        self.escapes = 0
+        self.duration = 0.0
+        self.categories = dict.fromkeys(CATEGORIES, 0)
+
+    def __call__(self, record):
+        self.records.append(record)
+        self.flushes += 1
+        self.bytes += record.bytes
+        self.writes += record.writes
+        self.escapes += record.escapes
+        self.duration += record.duration
+        for k, v in record.categories.items():
+            self.categories[k] += v
+
+    def percentile(self, field, p):
+        """Get the p-th percentile of a field (such as "bytes" or
+        "duration") over the recent records.
+        """
+        values = sorted(getattr(r, field) for r in self.records)
+        if not values:
+            return 0
+        return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+    def histogram(self, field, edges):
+        """Count the recent records whose field falls into each bucket.
+        edges are the increasing upper bounds of the buckets; the last
+        count is for values above all of them.
+        """
+        counts = [0] * (len(edges) + 1)
+        for r in self.records:
+            value = getattr(r, field)
+            i = 0
+            while i < len(edges) and value > edges[i]:
+                i += 1
+            counts[i] += 1
+        return counts
+
+    def summary(self):
+        """Get the totals and per-flush averages as a dict.
+        """
+        n = max(self.flushes, 1)
+        return {
+            "flushes": self.flushes,
+            "bytes": self.bytes,
+            "writes": self.writes,
+            "escapes": self.escapes,
+            "duration": self.duration,
+            "categories": dict(self.categories),
+            "bytes_per_flush": self.bytes / n,
+            "escapes_per_flush": self.escapes / n,
+            "duration_p50": self.percentile("duration", 50),
+            "duration_p99": self.percentile("duration", 99)}
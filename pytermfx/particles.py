@@ -0,0 +1,274 @@
+"""Particle systems with many thousands of particles.
+Particles are stored as parallel arrays (NumPy arrays if NumPy is installed,
+otherwise array.array) and updated in bulk. Dead particles are removed by
+moving live ones into their place, so removal never shifts the arrays.
+Drawing sends each occupied cell once, as one batch of runs for
+Terminal.write_runs().
+"""
+
+from pytermfx.color import Color
+from pytermfx.style import Style
+from array import array
+import math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_FLOAT_FIELDS = ("x", "y", "vx", "vy", "age", "life")
+
+def rainbow(n=64):
+    """Make a palette of n fully saturated hues.
+    """
+    return [Color.hsl(i / n, 1.0, 0.5) for i in range(n)]
+
+class ParticleSystem:
+    """A set of particles with positions, velocities, ages, lifetimes and
+    colors. The live particles are the first count entries of the arrays
+    x, y, vx, vy, age, life and color; color is an index into palette.
+    gravity  - (ax, ay) acceleration, in cells per unit of time squared
+    bounds   - (x0, y0, x1, y1); particles that leave it die. None to
+               keep particles wherever they go.
+    """
+    def __init__(self, capacity=1024, palette=None, gravity=(0.0, 0.0),
+                 bounds=None, use_numpy=True):
+        self.palette = rainbow() if palette is None else list(palette)
+        self.gravity = gravity
+        self.bounds = bounds
+        self.count = 0
+        self._numpy = np is not None and use_numpy
+        self._drawn = {}     # cell key -> palette index from the last draw
+        self._drawn_w = None
+        self._allocate(max(1, int(capacity)))
+
+    def _allocate(self, capacity):
+        n = self.count
+        if self._numpy:
+            for name in _FLOAT_FIELDS:
+                new = np.zeros(capacity, dtype=np.float64)
+                if n:
+                    new[:n] = getattr(self, name)[:n]
+                setattr(self, name, new)
+            new = np.zeros(capacity, dtype=np.uint16)
+            if n:
+                new[:n] = self.color[:n]
+            self.color = new
+        else:
+            for name in _FLOAT_FIELDS:
+                old = getattr(self, name, None)
+                new = array("d", old[:n] if old is not None else ())
+                new.extend(array("d", [0.0]) * (capacity - n))
+                setattr(self, name, new)
+            old = getattr(self, "color", None)
+            new = array("H", old[:n] if old is not None else ())
+            new.extend(array("H", [0]) * (capacity - n))
+            self.color = new
+        self.capacity = capacity
+
+    def _reserve(self, n):
+        if self.count + n > self.capacity:
+            capacity = self.capacity
+            while capacity < self.count + n:
+                capacity *= 2
+            self._allocate(capacity)
+
+    def __len__(self):
+        return self.count
+
+    def emit(self, x, y, vx=0.0, vy=0.0, color=0, life=math.inf):
+        """Add one particle.
+        """
+        self._reserve(1)
+        i = self.count
+        self.x[i] = x
+        self.y[i] = y
+        self.vx[i] = vx
+        self.vy[i] = vy
+        self.age[i] = 0.0
+        self.life[i] = life
+        self.color[i] = color % len(self.palette)
+        self.count = i + 1
+        return self
+
+    def emit_many(self, x, y, vx=0.0, vy=0.0, color=0, life=math.inf):
+        """Add many particles at once. Each argument is a sequence, or a
+        single value shared by all of the new particles.
+        """
+        columns = (x, y, vx, vy, color, life)
+        n = max((len(c) for c in columns if hasattr(c, "__len__")), default=1)
+        self._reserve(n)
+        i = self.count
+        j = i + n
+        if self._numpy:
+            self.x[i:j] = x
+            self.y[i:j] = y
+            self.vx[i:j] = vx
+            self.vy[i:j] = vy
+            self.age[i:j] = 0.0
+            self.life[i:j] = life
+            self.color[i:j] = np.asarray(color) % len(self.palette)
+        else:
+            def column(c):
+                return c if hasattr(c, "__len__") else [c] * n
+            self.x[i:j] = array("d", column(x))
+            self.y[i:j] = array("d", column(y))
+            self.vx[i:j] = array("d", column(vx))
+            self.vy[i:j] = array("d", column(vy))
+            self.age[i:j] = array("d", [0.0]) * n
+            self.life[i:j] = array("d", column(life))
+            self.color[i:j] = array("H", (c % len(self.palette)
+                                          for c in column(color)))
+        self.count = j
+        return self
+
+    def clear(self):
+        """Remove every particle.
+        """
+        self.count = 0
+        return self
+
+    def update(self, dt=1.0):
+        """Move every particle, accelerate it by gravity, age it, and remove
+        the ones that died or left the bounds.
+        """
+        if self._numpy:
+            self._update_numpy(dt)
+        else:
+            self._update_python(dt)
+        return self
+
+    def _update_numpy(self, dt):
+        n = self.count
+        if n == 0:
+            return
+        ax, ay = self.gravity
+        x, y = self.x[:n], self.y[:n]
+        vx, vy = self.vx[:n], self.vy[:n]
+        age = self.age[:n]
+        x += vx * dt
+        y += vy * dt
+        if ax:
+            vx += ax * dt
+        if ay:
+            vy += ay * dt
+        age += dt
+        alive = age < self.life[:n]
+        if self.bounds is not None:
+            x0, y0, x1, y1 = self.bounds
+            alive &= (x >= x0) & (x < x1) & (y >= y0) & (y < y1)
+        live = int(np.count_nonzero(alive))
+        if live == n:
+            return
+        # compact: move the live particles to the front, in bulk
+        for name in _FLOAT_FIELDS + ("color",):
+            a = getattr(self, name)
+            a[:live] = a[:n][alive]
+        self.count = live
+
+    def _update_python(self, dt):
+        ax, ay = self.gravity
+        bounds = self.bounds
+        if bounds is not None:
+            bx0, by0, bx1, by1 = bounds
+        xs, ys, vxs, vys = self.x, self.y, self.vx, self.vy
+        ages, lives, colors = self.age, self.life, self.color
+        n = self.count
+        i = 0
+        while i < n:
+            x = xs[i] + vxs[i] * dt
+            y = ys[i] + vys[i] * dt
+            age = ages[i] + dt
+            if age >= lives[i] or (bounds is not None and
+                                   not (bx0 <= x < bx1 and by0 <= y < by1)):
+                # swap the last particle into this slot
+                n -= 1
+                xs[i] = xs[n]
+                ys[i] = ys[n]
+                vxs[i] = vxs[n]
+                vys[i] = vys[n]
+                ages[i] = ages[n]
+                lives[i] = lives[n]
+                colors[i] = colors[n]
+                continue
+            xs[i] = x
+            ys[i] = y
+            vxs[i] += ax * dt
+            vys[i] += ay * dt
+            ages[i] = age
+            i += 1
+        self.count = n
+
+    def cells(self, w, h):
+        """Map the cells of a w by h area that contain particles to the
+        palette index of the last particle in each.
+        """
+        n = self.count
+        if n == 0:
+            return {}
+        if self._numpy:
+            xi = self.x[:n].astype(np.int64)
+            yi = self.y[:n].astype(np.int64)
+            inside = (xi >= 0) & (xi < w) & (yi >= 0) & (yi < h)
+            keys = (yi * w + xi)[inside]
+            return dict(zip(keys.tolist(), self.color[:n][inside].tolist()))
+        cells = {}
+        for x, y, c in zip(self.x[:n], self.y[:n], self.color[:n]):
+            x = int(x)
+            y = int(y)
+            if 0 <= x < w and 0 <= y < h:
+                cells[y * w + x] = c
+        return cells
+
+    def draw(self, terminal, ch="@", erase=True):
+        """Draw the particles directly to a terminal, one character per
+        occupied cell. With erase, the cells that held particles in the
+        last draw and are now empty are cleared.
+        """
+        w = terminal.w
+        h = terminal.h
+        cells = self.cells(w, h)
+        drawn = cells
+        if erase and self._drawn_w == w:
+            # after a resize that kept the width, rows past the bottom are
+            # gone
+            end = w * h
+            gone = self._drawn.keys() - cells.keys()
+            merged = dict.fromkeys((key for key in gone if key < end), None)
+            merged.update(cells)
+            cells = merged
+        self._drawn = drawn
+        self._drawn_w = w
+
+        # a run per cell; neighboring cells of the same color still go out
+        # without a cursor move or style change between them. Erased cells
+        # are spaces in Style.none.
+        looks = {i: ((color,), ch) for i, color in enumerate(self.palette)}
+        looks[None] = ((), " ")
+        runs = [(key % w, key // w) + looks[cells[key]] for key in sorted(cells)]
+        terminal.write_runs(runs)
+        terminal.style(Style.none)
+        return self
+
+    def draw_to(self, target, ch="@", erase=True):
+        """Draw the particles into a ScreenBuffer or compositor Layer.
+        With erase, the cells that held particles in the last draw and are
+        now empty are cleared (made transparent, on a Layer).
+        """
+        w = target.w
+        cells = self.cells(w, target.h)
+        if erase and self._drawn_w == w:
+            clear = getattr(target, "erase", None)
+            for key in self._drawn.keys() - cells.keys():
+                y, x = divmod(key, w)
+                if clear is not None:
+                    clear(x, y, 1, 1)
+                else:
+                    target.put(x, y, " ")
+        self._drawn = cells
+        self._drawn_w = w
+        palette = self.palette
+        for key, c in cells.items():
+            y, x = divmod(key, w)
+            target.put(x, y, ch, palette[c])
+        return self
@@ -0,0 +1,138 @@
+"""Fast conversion of RGB colors into ANSI color escapes.
+Palette lookups go through precomputed tables, and the resulting escape
+strings are built once and reused.
+"""
+
+from pytermfx.constants import *
+from functools import lru_cache
+
+# xterm values of the 16 named colors and their SGR offsets
+PALETTE_16 = ((0,0,0), (205,0,0), (0,205,0), (205,205,0),
+	(0,0,238), (205,0,205), (0,205,205), (229,229,229),
+	(127,127,127), (255,0,0), (0,255,0), (255,255,0),
+	(92,92,255), (255,0,255), (0,255,255), (255,255,255))
+IDS_16 = tuple(range(0, 8)) + tuple(range(60, 68))
+
+# per-channel lookups for the 256 color palette
+SCALE_6 = bytes(int(c / 256 * 6) for c in range(256))
+SCALE_24 = bytes(int(c / 256 * 24) for c in range(256))
+
+# escape strings indexed by [bg][palette index]
+ESCAPES_16 = tuple(
+	tuple(CSI + str((40 if bg else 30) + i) + "m" for i in IDS_16)
+	for bg in (False, True))
+ESCAPES_256 = tuple(
+	tuple(CSI + ("48;5;" if bg else "38;5;") + str(i) + "m" for i in range(256))
+	for bg in (False, True))
+
+# the 16 color lookup table has 32 levels per channel (5 bits)
+TABLE_BITS = 5
+_UNKNOWN = 0xFF
+
+def _linear(c):
+	c /= 255
+	return c / 12.92 if c <= 0.04045 else ((c + 0.055) / 1.055) ** 2.4
+
+@lru_cache(maxsize=1024)
+def _lab(rgb):
+	"""Convert an sRGB color to CIELAB (D65 white point).
+	"""
+	r, g, b = (_linear(c) for c in rgb)
+	x = (0.4124 * r + 0.3576 * g + 0.1805 * b) / 0.95047
+	y = (0.2126 * r + 0.7152 * g + 0.0722 * b)
+	z = (0.0193 * r + 0.1192 * g + 0.9505 * b) / 1.08883
+	f = lambda t: t ** (1/3) if t > 0.008856 else 7.787 * t + 16/116
+	fx, fy, fz = f(x), f(y), f(z)
+	return (116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz))
+
+def _dist_euclidean(a, b):
+	return (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 + (a[2] - b[2]) ** 2
+
+def _dist_redmean(a, b):
+	rmean = (a[0] + b[0]) / 2
+	dr = a[0] - b[0]
+	dg = a[1] - b[1]
+	db = a[2] - b[2]
+	return ((512 + rmean) * dr * dr) / 256 + 4 * dg * dg + ((767 - rmean) * db * db) / 256
+
+def _dist_cielab(a, b):
+	return _dist_euclidean(_lab(a), _lab(b))
+
+METRICS = {
+	"euclidean": _dist_euclidean,
+	"redmean": _dist_redmean,
+	"cielab": _dist_cielab
+}
+
+_metric = "euclidean"
+on_metric_change = []  # called when cached 16 color results become invalid
+_table_16 = bytearray([_UNKNOWN]) * (1 << (3 * TABLE_BITS))
+
+def set_metric(name):
+	"""Choose the color distance used to find the closest named color.
+	name is one of "euclidean" (default), "redmean" or "cielab".
+	"""
+	global _metric, _table_16
+	if name not in METRICS:
+		raise ValueError("metric must be one of: " + ", ".join(METRICS))
+	_metric = name
+	_table_16 = bytearray([_UNKNOWN]) * (1 << (3 * TABLE_BITS))
+	for callback in on_metric_change:
+		callback()
+
+def get_metric():
+	return _metric
+
+def table_16():
+	"""Retrieve the 16 color lookup table, filled in completely.
+	The table maps ((r >> 3) << 10) | ((g >> 3) << 5) | (b >> 3) to an index
+	into PALETTE_16.
+	"""
+	for i, v in enumerate(_table_16):
+		if v == _UNKNOWN:
+			_fill_16(i)
+	return _table_16
+
+def _fill_16(i):
+	shift = 8 - TABLE_BITS
+	mask = (1 << TABLE_BITS) - 1
+	half = 1 << (shift - 1)
+	own = (((i >> (2 * TABLE_BITS)) << shift) + half,
+	       (((i >> TABLE_BITS) & mask) << shift) + half,
+	       ((i & mask) << shift) + half)
+	dist = METRICS[_metric]
+	best = min(range(16), key=lambda j: dist(PALETTE_16[j], own))
+	_table_16[i] = best
+	return best
+
+def index_16(r, g, b):
+	"""Find the index into PALETTE_16 of the closest named color.
+	Entries of the lookup table are computed on first use.
+	"""
+	shift = 8 - TABLE_BITS
+	i = ((r >> shift) << (2 * TABLE_BITS)) | ((g >> shift) << TABLE_BITS) | (b >> shift)
+	best = _table_16[i]
+	if best == _UNKNOWN:
+		best = _fill_16(i)
+	return best
+
+def index_256(r, g, b):
+	"""Find the 8-bit color index for an RGB color.
+	Uses the 216 RGB colors and the 24 grayscale colors.
+	"""
+	if r == g == b:
+		if r == 255: # pure white
+			return 231
+		return 232 + SCALE_24[r]
+	return 16 + SCALE_6[r] * 36 + SCALE_6[g] * 6 + SCALE_6[b]
+
+def escape_16(r, g, b, bg=False):
+	return ESCAPES_16[bg][index_16(r, g, b)]
+
+def escape_256(r, g, b, bg=False):
+	return ESCAPES_256[bg][index_256(r, g, b)]
+
+@lru_cache(maxsize=1 << 16)
+def escape_rgb(r, g, b, bg=False):
+	return "".join((CSI, "48;2;" if bg else "38;2;",
+		str(r), ";", str(g), ";", str(b), "m"))
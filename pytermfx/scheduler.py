@@ -0,0 +1,197 @@
+"""Frame pacing for animated terminal apps.
+"""
+
+from collections import deque
+import asyncio
+import inspect
+import time
+
+VARIABLE = "variable"  # update once per frame with the real elapsed time
+FIXED = "fixed"        # update in steps of exactly one period, catching up
+
+class FrameStats:
+    """Timing of the most recent frames of a FrameScheduler.
+    frames  - number of frames run
+    late    - number of frames whose work took longer than the budget
+    skipped - number of frames (or fixed steps) dropped to catch up
+    """
+    def __init__(self, window=120):
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        self.frames = 0
+        self.late = 0
+        self.skipped = 0
+        self._intervals = deque(maxlen=self.window)
+        self._work = deque(maxlen=self.window)
+
+    def record(self, interval, work, late=False):
+        """Add a frame that started interval seconds after the previous one
+        and took work seconds to run.
+        """
+        self.frames += 1
+        self.late += bool(late)
+        if interval is not None:
+            self._intervals.append(interval)
+        self._work.append(work)
+
+    @staticmethod
+    def _percentile(values, p):
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    def frame_time(self, p=50):
+        """Get the p-th percentile of the time between frames, in seconds.
+        """
+        return self._percentile(self._intervals, p)
+
+    def work_time(self, p=50):
+        """Get the p-th percentile of the time spent running frames, in
+        seconds.
+        """
+        return self._percentile(self._work, p)
+
+    @property
+    def fps(self):
+        total = sum(self._intervals)
+        return len(self._intervals) / total if total > 0 else 0.0
+
+    @property
+    def p50(self):
+        return self.frame_time(50)
+
+    @property
+    def p99(self):
+        return self.frame_time(99)
+
+    def __repr__(self):
+        return ("FrameStats(fps={:.1f}, p50={:.1f}ms, p99={:.1f}ms, "
+                "late={}, skipped={})").format(self.fps, self.p50 * 1000,
+                self.p99 * 1000, self.late, self.skipped)
+
+class FrameScheduler:
+    """Runs frames at a steady rate using a monotonic clock.
+    framerate - target frames per second
+    timestep  - VARIABLE: update(dt) runs once per frame with the time since
+                the last frame.
+                FIXED: update(dt) runs with dt of exactly one period, as many
+                times as needed to keep up with the clock (at most max_steps
+                per frame), then render() runs once.
+    budget    - seconds a frame may take before it counts as late (defaults
+                to one period)
+    max_steps - catch-up limit for FIXED; further steps are skipped
+    When a frame overruns, the deadlines it missed are skipped instead of
+    running a burst of frames to make up for them.
+    """
+    def __init__(self, framerate, timestep=VARIABLE, budget=None, max_steps=5,
+                 clock=time.perf_counter, sleep=time.sleep):
+        if framerate <= 0:
+            raise ValueError("framerate must be positive.")
+        if timestep not in (VARIABLE, FIXED):
+            raise ValueError("timestep must be VARIABLE or FIXED.")
+        self.framerate = framerate
+        self.timestep = timestep
+        self.budget = budget
+        self.max_steps = max_steps
+        self.clock = clock
+        self.sleep = sleep
+        self.stats = FrameStats()
+        self.dt = 0.0     # time passed to the last update
+        self.alpha = 0.0  # FIXED: fraction of a step not yet simulated
+
+    @property
+    def period(self):
+        return 1 / self.framerate
+
+    def run(self, update, render=None, running=lambda: True):
+        """Run frames until running() returns False.
+        """
+        self._reset()
+        while running():
+            delay = self._delay()
+            if delay > 0:
+                self.sleep(delay)
+            if not running():
+                return
+            start = self.clock()
+            for dt in self._steps(start):
+                self.dt = dt
+                update(dt)
+            if render is not None:
+                render()
+            self._end_frame(start)
+
+    async def run_async(self, update, render=None, running=lambda: True):
+        """Run frames until running() returns False, waiting between them
+        with asyncio.sleep() so that other tasks can run, even when behind.
+        update() and render() may return awaitables; they are awaited as part
+        of the frame, so their time counts towards it.
+        """
+        self._reset()
+        while running():
+            await asyncio.sleep(self._delay())
+            if not running():
+                return
+            start = self.clock()
+            for dt in self._steps(start):
+                self.dt = dt
+                result = update(dt)
+                if inspect.isawaitable(result):
+                    await result
+            if render is not None:
+                result = render()
+                if inspect.isawaitable(result):
+                    await result
+            self._end_frame(start)
+
+    def _reset(self):
+        self._deadline = self.clock()
+        self._last = None
+        self._accumulator = 0.0
+
+    def _delay(self):
+        # the time to wait before the next frame (0 when it is due already)
+        return max(0.0, self._deadline - self.clock())
+
+    def _steps(self, start):
+        """Get the dt of each update to run in a frame that starts at start.
+        """
+        period = self.period
+        last = self._last
+        if self.timestep == VARIABLE:
+            return [start - last if last is not None else period]
+        if last is not None:
+            self._accumulator += start - last
+        else:
+            self._accumulator = period
+        steps = min(int(self._accumulator // period), self.max_steps)
+        self._accumulator -= steps * period
+        if self._accumulator >= period:
+            dropped = int(self._accumulator // period)
+            self.stats.skipped += dropped
+            self._accumulator -= dropped * period
+        self.alpha = self._accumulator / period
+        return [period] * steps
+
+    def _end_frame(self, start):
+        """Record the timing of a frame that started at start and schedule
+        the next one.
+        """
+        period = self.period
+        end = self.clock()
+        last = self._last
+        budget = self.budget if self.budget is not None else period
+        self.stats.record(start - last if last is not None else None,
+                          end - start, end - start > budget)
+        self._last = start
+
+        # skip the deadlines that have already passed
+        self._deadline += period
+        if self._deadline < end:
+            missed = int((end - self._deadline) // period) + 1
+            if self.timestep == VARIABLE:
+                self.stats.skipped += missed
+            self._deadline += missed * period
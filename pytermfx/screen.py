@@ -0,0 +1,216 @@
+from pytermfx.style import Style
+from pytermfx.width import cells
+
+# longest run of unchanged cells that present() rewrites instead of skipping
+BRIDGE_GAP = 3
+
+def text_cells(text):
+    """Convert text into a list of the strings in each cell it covers.
+    A wide character covers two cells: the character, then an empty string.
+    """
+    chars = []
+    for g, gw in cells(text):
+        if gw == 2:
+            chars += (g, "")
+        elif gw == 1:
+            chars.append(g)
+        elif chars:
+            chars[-1] += g
+    return chars
+
+class ScreenBuffer:
+    """A double-buffered grid of cells covering the whole terminal.
+    Draw into the back buffer with put(), write() and fill(), then call
+    present() to send only the cells that changed since the last frame.
+    Each cell holds a character, a foreground Color, a background Color and
+    a Style. Colors and styles may be None to use the terminal default.
+    A wide character fills two cells: the character, then an empty string.
+    """
+    def __init__(self, terminal):
+        self.terminal = terminal
+        self.w = 0
+        self.h = 0
+        self.resize()
+        terminal.add_resize_handler(self.resize)
+
+    def resize(self):
+        """Match the buffer to the current size of the terminal.
+        The buffer is cleared and the next present() repaints everything.
+        """
+        self.w = self.terminal.w
+        self.h = self.terminal.h
+        self._chars = [[" "] * self.w for _ in range(self.h)]
+        self._fg = [[None] * self.w for _ in range(self.h)]
+        self._bg = [[None] * self.w for _ in range(self.h)]
+        self._styles = [[None] * self.w for _ in range(self.h)]
+        self.invalidate()
+
+    def invalidate(self):
+        """Forget what is on screen so that the next present() repaints
+        every cell.
+        """
+        self._front_chars = [[None] * self.w for _ in range(self.h)]
+        self._front_fg = [[None] * self.w for _ in range(self.h)]
+        self._front_bg = [[None] * self.w for _ in range(self.h)]
+        self._front_styles = [[None] * self.w for _ in range(self.h)]
+
+    def put(self, x, y, ch, fg=None, bg=None, style=None):
+        """Set a single cell of the back buffer.
+        Cells outside of the buffer are ignored.
+        """
+        x = int(x)
+        y = int(y)
+        if x < 0 or y < 0 or x >= self.w or y >= self.h:
+            return self
+        if not ch.isascii():
+            return self.write(x, y, ch, fg, bg, style)
+        if style == Style.none:
+            style = None
+        self._split_wide(y, x, x + 1)
+        self._chars[y][x] = ch
+        self._fg[y][x] = fg
+        self._bg[y][x] = bg
+        self._styles[y][x] = style
+        return self
+
+    def get(self, x, y):
+        """Retrieve the (ch, fg, bg, style) tuple of a back buffer cell.
+        """
+        x = int(x)
+        y = int(y)
+        return (self._chars[y][x], self._fg[y][x], self._bg[y][x],
+                self._styles[y][x])
+
+    def write(self, x, y, text, fg=None, bg=None, style=None):
+        """Write a string into the back buffer starting at (x, y).
+        Text that falls outside of the buffer is clipped.
+        """
+        x = int(x)
+        y = int(y)
+        if y < 0 or y >= self.h:
+            return self
+        if not text.isascii():
+            text = text_cells(text)
+        start = max(0, -x)
+        end = min(len(text), self.w - x)
+        if start >= end:
+            return self
+        if style == Style.none:
+            style = None
+        n = end - start
+        chars = text[start:end]
+        if type(chars) is list:
+            # clipping may cut a wide character in half
+            if chars[0] == "":
+                chars[0] = " "
+            if end < len(text) and text[end] == "":
+                chars[-1] = " "
+        self._split_wide(y, x + start, x + end)
+        self._chars[y][x + start:x + end] = chars
+        self._fg[y][x + start:x + end] = [fg] * n
+        self._bg[y][x + start:x + end] = [bg] * n
+        self._styles[y][x + start:x + end] = [style] * n
+        return self
+
+    def _split_wide(self, y, x0, x1):
+        """Blank the other half of any wide character that cells x0 to x1
+        of a row only partly cover.
+        """
+        chars = self._chars[y]
+        if chars[x0] == "" and x0 > 0:
+            chars[x0 - 1] = " "
+        if x1 < self.w and chars[x1] == "":
+            chars[x1] = " "
+
+    def fill(self, x, y, w, h, ch=" ", fg=None, bg=None, style=None):
+        """Fill a region of the back buffer.
+        """
+        x0 = max(int(x), 0)
+        x1 = min(int(x + w), self.w)
+        if x0 >= x1:
+            return self
+        for row in range(max(int(y), 0), min(int(y + h), self.h)):
+            self.write(x0, row, ch * (x1 - x0), fg, bg, style)
+        return self
+
+    def clear(self, fg=None, bg=None, style=None):
+        """Fill the whole back buffer with blank cells.
+        """
+        return self.fill(0, 0, self.w, self.h, " ", fg, bg, style)
+
+    def present(self, flush=True):
+        """Send the cells that changed since the last present() to the
+        terminal, then make the back buffer the new front buffer.
+        """
+        t = self.terminal
+        if flush:
+            # send the frame in one synchronized write
+            t.adaptor.frame_begin()
+        pen = None
+        for y in range(self.h):
+            chars = self._chars[y]
+            fgs = self._fg[y]
+            bgs = self._bg[y]
+            styles = self._styles[y]
+            front_chars = self._front_chars[y]
+            front_fgs = self._front_fg[y]
+            front_bgs = self._front_bg[y]
+            front_styles = self._front_styles[y]
+
+            # skip unchanged rows without looking at individual cells
+            if (chars == front_chars and fgs == front_fgs and
+                bgs == front_bgs and styles == front_styles):
+                continue
+
+            def changed(i):
+                return not (chars[i] == front_chars[i] and
+                            fgs[i] == front_fgs[i] and
+                            bgs[i] == front_bgs[i] and
+                            styles[i] == front_styles[i])
+
+            x = 0
+            w = self.w
+            while x < w:
+                if not changed(x):
+                    x += 1
+                    continue
+
+                # emit a run of changed cells
+                t.cursor_to(x, y)
+                run = []
+                while x < w:
+                    if not changed(x):
+                        # rewriting a few unchanged cells that use the
+                        # current pen is cheaper than moving the cursor
+                        gap = x
+                        while (gap < w and gap - x <= BRIDGE_GAP and
+                               not changed(gap) and
+                               (styles[gap], fgs[gap], bgs[gap]) == pen):
+                            gap += 1
+                        if gap < w and gap - x <= BRIDGE_GAP and changed(gap):
+                            run += chars[x:gap]
+                            x = gap
+                            continue
+                        break
+                    cell_pen = (styles[x], fgs[x], bgs[x])
+                    if cell_pen != pen:
+                        if run:
+                            t.write("".join(run))
+                            run = []
+                        t.style(Style.none,
+                                *(s for s in cell_pen if s is not None))
+                        pen = cell_pen
+                    run.append(chars[x])
+                    x += 1
+                t.write("".join(run))
+
+            self._front_chars[y] = chars[:]
+            self._front_fg[y] = fgs[:]
+            self._front_bg[y] = bgs[:]
+            self._front_styles[y] = styles[:]
+
+        if pen is not None:
+            t.style(Style.none)
+        if flush:
+            t.adaptor.frame_end()
+        return self
@@ -22,6 +22,14 @@ class Style:
 		for s in styles:
 			self.add(s)
 
+	def __eq__(self, other):
+		if type(other) is not type(self):
+			return False
+		return self.styles == other.styles
+
+	def __hash__(self):
+		return hash(frozenset(self.styles))
+
 	def add(self, style):
 		if style == "reset":
 			raise ValueError("Use Style.none instance to reset style.")
@@ -41,6 +49,12 @@ class NoneStyle(Style):
 	def __init__(self):
 		pass
 
+	def __eq__(self, other):
+		return type(other) is type(self)
+
+	def __hash__(self):
+		return hash(NoneStyle)
+
 	def add(self):
 		return NotImplemented
 
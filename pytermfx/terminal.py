@@ -1,19 +1,29 @@
 from pytermfx.color import Color, ColorMode
 from pytermfx.adaptors import BaseAdaptor, PlatformAdaptor, STDIN, STDOUT
+from pytermfx.blit import blit
+from pytermfx.width import width
+from contextlib import contextmanager
 import sys
 
 class Terminal:
-    def __init__(self, input_file = STDIN, output_file = STDOUT):
+    def __init__(self, input_file = STDIN, output_file = STDOUT, adaptor = None):
+        """Construct a terminal on the given files.
+        adaptor may be an adaptor class (or other callable) to use instead of
+        the one for the current platform, such as HeadlessAdaptor.
+        """
         args = {
             "input_file": input_file,
             "output_file": output_file, 
             "resize_handler": self._handle_resize}
         self._resize_handlers = []
 
-        try:
-            self.adaptor = PlatformAdaptor(**args)
-        except:
-            self.adaptor = BaseAdaptor(**args)
+        if adaptor is not None:
+            self.adaptor = adaptor(**args)
+        else:
+            try:
+                self.adaptor = PlatformAdaptor(**args)
+            except:
+                self.adaptor = BaseAdaptor(**args)
         
         self.w = 0
         self.h = 0
@@ -69,8 +79,10 @@ class Terminal:
     def set_cbreak(self, cbreak=True):
         return self.adaptor.set_cbreak(cbreak)
 
-    def mouse_enable(self, mode="move"):
-        return self.adaptor.mouse_enable(mode)
+    def mouse_enable(self, mode="move", **kwargs):
+        """Enable mouse events from getch(). See VT100Adaptor.mouse_enable.
+        """
+        return self.adaptor.mouse_enable(mode, **kwargs)
 
     def getch(self):
         """Get a single character from stdin in cbreak mode.
@@ -97,6 +109,15 @@ class Terminal:
         self.adaptor.writeln(*things)
         return self
 
+    def write_runs(self, runs):
+        """Write many runs of text at once. runs is an iterable of
+        (x, y, styles, text) tuples: text is written at (x, y) in Style.none
+        with the Colors and Styles in the styles tuple applied, as with
+        cursor_to(), style() and write().
+        """
+        self.adaptor.write_runs(runs)
+        return self
+
     def flush(self):
         """Flush the buffer to the terminal.
         """
@@ -160,9 +181,20 @@ class Terminal:
     def fill_box(self, x, y, w, h, ch):
         """Fills a region of the terminal
         """
-        for i in range(max(int(y), 0), min(self.w, int(y+h))):
+        # ch may be wider than one cell
+        count = min(min(w, w+x), self.w - x) // max(1, width(ch))
+        for i in range(max(int(y), 0), min(self.h, int(y+h))):
             self.adaptor.cursor_to(max(int(x), 0), i)
-            self.adaptor.write(ch * min(min(w, w+x), self.w - x))
+            self.adaptor.write(ch * count)
+        return self
+
+    def blit(self, chars=None, fg=None, bg=None, x=0, y=0):
+        """Draw a block of cells with its top left corner at (x, y).
+        chars is an HxW array of code points or a list of strings, and fg and
+        bg are HxWx3 arrays of RGB values or nested lists of RGB tuples.
+        Any of them may be None. See pytermfx.blit for details.
+        """
+        blit(self, chars, fg, bg, x, y)
         return self
 
     def clear_box(self, x, y, w, h):
@@ -172,6 +204,41 @@ class Terminal:
     def set_color_mode(self, mode):
         self.adaptor.set_color_mode(mode)
 
+    def get_color_mode(self):
+        return self.adaptor.get_color_mode()
+
+    @contextmanager
+    def frame(self):
+        """Draw a frame atomically:
+            with terminal.frame():
+                ...draw...
+        Everything drawn inside the block, including flush() calls, is sent
+        in a single write when the block ends. Terminals that support
+        synchronized output also hold off drawing until the frame is complete,
+        which prevents tearing. See probe_sync_output().
+        """
+        self.adaptor.frame_begin()
+        try:
+            yield self
+        finally:
+            self.adaptor.frame_end()
+
+    def probe_sync_output(self, timeout=0.2):
+        """Find out whether the terminal supports synchronized output.
+        Until this is called, frames request it anyway, since terminals
+        ignore requests for modes they don't know.
+        Returns True, False or None (unknown).
+        """
+        return self.adaptor.probe_sync_output(timeout)
+
+    def set_metrics(self, sink):
+        """Measure every flush and pass a pytermfx.metrics.FlushRecord to
+        sink, which may be any callable (such as a MetricsRecorder). Pass
+        None to stop measuring.
+        """
+        self.adaptor.set_metrics(sink)
+        return self
+
     def style(self, *styles):
         """Apply styles, which may be a Color or something with .ansi()
         Accepts a Color or a Style.
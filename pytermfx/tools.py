@@ -1,8 +1,10 @@
 from pytermfx.constants import *
 from pytermfx import Terminal, NamedColor
+from pytermfx.scheduler import FrameScheduler, VARIABLE
+from pytermfx.keymap import Keymap
+from pytermfx.width import width
 from threading import Thread
 import sys
-import time
 
 
 class TerminalApp:
@@ -10,6 +12,13 @@ class TerminalApp:
     The client must call start() after constructing the TerminalApp.
     The client may pass an update() parameter to redraw their application.
     The client may pass an on_input(char) parameter to accept a keyboard input.
+    The client may also pass a keymap (see pytermfx.keymap); on_input() then
+    only receives the input that the keymap does not handle.
+    With a framerate, update() is called at that rate by a FrameScheduler
+    (see pytermfx.scheduler), whose stats are available as app.stats.
+    The client may also pass timestep=FIXED and a render() parameter; update()
+    then advances the app in fixed steps of app.scheduler.dt seconds and
+    render() draws it once per frame.
     """
 
     def __init__(self, terminal, framerate=0, **kwargs):
@@ -18,7 +27,14 @@ class TerminalApp:
         self.framerate = framerate
         self.on_input = kwargs["on_input"] if "on_input" in kwargs else lambda char: None
         self.update = kwargs["update"] if "update" in kwargs else lambda: None
-        self.terminal.add_resize_handler(self.update)
+        self.render = kwargs["render"] if "render" in kwargs else None
+        self.keymap = kwargs.get("keymap")
+        self.scheduler = None
+        if framerate > 0:
+            self.scheduler = FrameScheduler(framerate,
+                timestep=kwargs.get("timestep", VARIABLE),
+                budget=kwargs.get("budget"))
+        self.terminal.add_resize_handler(self.render or self.update)
         self._running = False
         self._threads = []
 
@@ -36,7 +52,8 @@ class TerminalApp:
             while self._running:
                 c = self.terminal.getch()
                 try:
-                    self.on_input(c)
+                    if self.keymap is None or not self.keymap.dispatch(c):
+                        self.on_input(c)
                 except:
                     self.stop()
                     raise
@@ -44,23 +61,34 @@ class TerminalApp:
 
         # create update thread
         def update_loop():
-            while self._running:
-                t0 = time.process_time()
-                try:
+            # each frame reaches the terminal in one synchronized write
+            def update(dt):
+                if self.render is not None:
                     self.update()
-                except:
-                    self.stop()
-                    raise
-                delay = (1 / self.framerate) - (time.process_time() - t0)
-                time.sleep(max(0, delay))
-        if (self.framerate > 0):
+                    return
+                with self.terminal.frame():
+                    self.update()
+            def render():
+                with self.terminal.frame():
+                    self.render()
+            try:
+                self.scheduler.run(update,
+                                   render if self.render is not None else None,
+                                   running=lambda: self._running)
+            except:
+                self.stop()
+                raise
+        if self.scheduler is not None:
             self.create_thread(update_loop)
 
         # startup
+        self.terminal.probe_sync_output()
         self.terminal.clear()
         self.terminal.flush()
         self.terminal._handle_resize()
         self.update()
+        if self.render is not None:
+            self.render()
         self._running = True
 
         # run threads
@@ -71,6 +99,13 @@ class TerminalApp:
         except KeyboardInterrupt:
             self.stop()
 
+    @property
+    def stats(self):
+        """Frame timing statistics (a FrameStats), or None without a
+        framerate.
+        """
+        return self.scheduler.stats if self.scheduler is not None else None
+
     def stop(self, before_cleanup=lambda: None):
         if not self._running:
             return
@@ -97,18 +132,21 @@ def draw_progress(terminal, progress=0, label="", *, color=NamedColor("white"),
     # compute sizes
     percentage = format.format(min(1, max(0, progress)) * 100)
     w = terminal.w
-    left_align = max(len(label) + 1, bar_left)
-    left_diff = left_align - (len(label) + 1)
-    inner_len = w - left_align - 1 - len(left + right) - 1 - len(percentage)
+    label_w = width(label)
+    left_align = max(label_w + 1, bar_left)
+    left_diff = left_align - (label_w + 1)
+    inner_len = w - left_align - 1 - width(left + right) - 1 - width(percentage)
     fill_len = int(inner_len * progress)
+    fill_w = max(1, width(fill))
+    head_w = width(head)
 
     # render progress bar
     terminal.cursor_set_visible(False)
     terminal.clear_line().write(label)
     terminal.write(" " * left_diff, left)
     terminal.style(color)
-    terminal.write(fill * (fill_len - len(head))).write(head)
-    terminal.write(empty * (inner_len - fill_len))
+    terminal.write(fill * ((fill_len - head_w) // fill_w)).write(head)
+    terminal.write(empty * ((inner_len - fill_len) // max(1, width(empty))))
     terminal.style_reset().write(right, " ", percentage)
     terminal.flush()
     terminal.cursor_set_visible(True)
@@ -128,13 +166,14 @@ def draw_vline(terminal, x, ch="║"):
 
 
 def print_hcenter(terminal, text, y):
-    x = max(0, (terminal.w - len(text)) // 2)
+    x = max(0, (terminal.w - width(text)) // 2)
     terminal.cursor_to(x, y)
     terminal.print(text)
 
 
-def read_line(terminal, update=lambda s: terminal.write(s),
-              autocomplete=lambda: None):
+def read_line(terminal, update=None, autocomplete=lambda word: None):
+    if update is None:
+        update = terminal.write
     old_status = terminal.adaptor._cbreak
     terminal.set_cbreak(True)
     terminal.cursor_save()
@@ -148,22 +187,31 @@ def read_line(terminal, update=lambda s: terminal.write(s),
         update(stringify())
         terminal.flush()
 
-    ch = None
+    done = []
+
+    def backspace():
+        if len(buffer) > 0:
+            terminal.cursor_move(-1, 0)
+            terminal.write(" ")
+            buffer.pop()
+
+    def complete():
+        word = stringify().split(" ")[-1]
+        candidate = autocomplete(word)
+        if candidate is not None:
+            del buffer[len(buffer) - len(word):]
+            buffer.extend(candidate)
+
+    keymap = Keymap()
+    keymap.bind("enter", lambda: done.append(True))
+    keymap.bind("backspace", backspace)
+    keymap.bind("tab", complete)
+
     while True:
         ch = terminal.getch()
-        if ch == "enter":
-            break
-        elif ch == "backspace":
-            if len(buffer) > 0:
-                terminal.cursor_move(-1, 0)
-                terminal.write(" ")
-                buffer.pop()
-        elif ch == "tab":
-            word = stringify().split(" ")[-1]
-            candidate = autocomplete(word)
-            if candidate is not None:
-                buffer = buffer[:-len(word)]
-                buffer += candidate
+        if keymap.dispatch(ch):
+            if done:
+                break
         elif ch.is_printable():
             buffer.append(ch)
         redraw()
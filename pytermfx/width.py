@@ -0,0 +1,165 @@
+"""Widths of text in terminal cells.
+Most characters take one cell, East Asian wide and fullwidth characters
+(including most emoji) take two, and combining marks, format characters
+and control characters take none. Widths are looked up in a table that is
+filled at import from the ranges in pytermfx._width_table, which are
+precomputed from unicodedata (see _generate()), so that no frame pays for
+building it.
+"""
+
+from pytermfx import _width_table
+from functools import lru_cache
+import unicodedata
+
+ZWJ = "\u200d"
+VS16 = "\ufe0f"    # emoji presentation selector
+
+_CJK_PLANES = (0x20000, 0x3ffff)
+_TAG_PLANE = (0xe0000, 0xe0fff)
+
+# blocks whose unassigned code points are reserved for wide characters:
+# CJK ideographs, and the emoji blocks that new emoji are added to
+_WIDE_BLOCKS = (
+    (0x3400, 0x4dbf), (0x4e00, 0x9fff), (0xf900, 0xfaff),
+    (0x1f300, 0x1f64f), (0x1f680, 0x1f6ff), (0x1f900, 0x1f9ff),
+    (0x1fa70, 0x1faff),
+)
+
+def _compute(cp):
+    ch = chr(cp)
+    category = unicodedata.category(ch)
+    if category == "Cn":
+        # east_asian_width() calls unassigned code points fullwidth
+        if any(first <= cp <= last for first, last in _WIDE_BLOCKS):
+            return 2
+        return 1
+    if category in ("Mn", "Me", "Cc") or (category == "Cf" and cp != 0xad):
+        return 0
+    if 0x1160 <= cp <= 0x11ff:
+        # Hangul medial vowels and final consonants join the syllable
+        return 0
+    if unicodedata.east_asian_width(ch) in ("W", "F"):
+        return 2
+    return 1
+
+def _generate(out):
+    """Write the source of pytermfx._width_table for the running Python's
+    unicodedata to out, a text file.
+    """
+    ranges = {0: [], 2: []}
+    cp = 0x20
+    while cp < 0x20000:
+        w = _compute(cp) if cp >= 0x7f else 1
+        end = cp + 1
+        while end < 0x20000 and (_compute(end) if end >= 0x7f else 1) == w:
+            end += 1
+        if w != 1:
+            ranges[w] += (cp, end - 1)
+        cp = end
+    out.write('"""Code point ranges of zero and double width characters,\n'
+              'generated by pytermfx.width._generate() from Unicode {}.\n'
+              'Each tuple holds pairs of first and last code points.\n'
+              '"""\n'.format(unicodedata.unidata_version))
+    for name, w in (("ZERO", 0), ("WIDE", 2)):
+        values = ["0x{:05x},".format(v) for v in ranges[w]]
+        out.write("\n{} = (\n".format(name))
+        for i in range(0, len(values), 8):
+            out.write("    " + " ".join(values[i:i + 8]) + "\n")
+        out.write(")\n")
+
+def _build():
+    # control characters are zero width, as the ranges leave them out
+    table = bytearray(b"\x01") * 0x20000
+    table[:0x20] = bytes(0x20)
+    table[0x7f:0xa0] = bytes(0xa0 - 0x7f)
+    for ranges, w in ((_width_table.ZERO, 0), (_width_table.WIDE, 2)):
+        for i in range(0, len(ranges), 2):
+            first = ranges[i]
+            last = ranges[i + 1]
+            table[first:last + 1] = bytes([w]) * (last + 1 - first)
+    return table
+
+_table = _build()  # width of each code point in planes 0 and 1
+
+def char_width(ch):
+    """Get the width of a single character: 0, 1 or 2.
+    """
+    cp = ord(ch)
+    if cp < 0x20000:
+        return _table[cp]
+    if _CJK_PLANES[0] <= cp <= _CJK_PLANES[1]:
+        return 2
+    if _TAG_PLANE[0] <= cp <= _TAG_PLANE[1]:
+        return 0
+    return 1
+
+def _is_regional(ch):
+    return "\U0001f1e6" <= ch <= "\U0001f1ff"
+
+def graphemes(s):
+    """Split a string into grapheme clusters: the characters that a
+    terminal draws together in one place. A cluster is a base character
+    with any marks after it, an emoji sequence joined by zero width
+    joiners, or a pair of regional indicators (a flag).
+    """
+    clusters = []
+    start = 0
+    n = len(s)
+    i = 0
+    while i < n:
+        ch = s[i]
+        i += 1
+        if _is_regional(ch) and i < n and _is_regional(s[i]):
+            i += 1
+        while i < n:
+            nxt = s[i]
+            if nxt == ZWJ:
+                i += 2 if i + 1 < n else 1
+            elif char_width(nxt) == 0 and nxt >= " ":
+                i += 1
+            else:
+                break
+        clusters.append(s[start:i])
+        start = i
+    return clusters
+
+def grapheme_width(g):
+    """Get the width of one grapheme cluster.
+    """
+    w = char_width(g[0])
+    if w == 1 and (VS16 in g or _is_regional(g[0]) and len(g) > 1):
+        return 2
+    return w
+
+@lru_cache(maxsize=4096)
+def _width(s):
+    if ZWJ in s or VS16 in s or any(_is_regional(ch) for ch in s):
+        return sum(map(grapheme_width, graphemes(s)))
+    return sum(map(char_width, s))
+
+def width(s):
+    """Get the width of a string in cells.
+    """
+    if s.isascii() and s.isprintable():
+        return len(s)
+    return _width(s)
+
+def cells(s):
+    """Split a string into a list of (grapheme, width) pairs.
+    """
+    return [(g, grapheme_width(g)) for g in graphemes(s)]
+
+def truncate(s, w):
+    """Get the longest prefix of a string that is at most w cells wide.
+    """
+    if s.isascii() and s.isprintable():
+        return s[:max(0, w)]
+    used = 0
+    end = 0
+    for g in graphemes(s):
+        gw = grapheme_width(g)
+        if used + gw > w:
+            break
+        used += gw
+        end += len(g)
+    return s[:end]
@@ -1,7 +1,7 @@
 from setuptools import setup
 setup(
 	name = 'pytermfx',
-	packages = ['pytermfx'],
+	packages = ['pytermfx', 'pytermfx.adaptors', 'pytermfx.bench'],
 	version = '0.4.3',
 	description = 'Terminal interaction and formatting for Python without curses',
 	author = 'Logan Zartman',
@@ -13,5 +13,8 @@ setup(
 		'License :: OSI Approved :: MIT License',
 		'Programming Language :: Python :: 3'
 	],
-	python_requires = ">=3"
+	python_requires = ">=3",
+	extras_require = {
+		"numpy": ["numpy"]
+	}
 )
@@ -0,0 +1,13 @@
+from pytermfx.escapes import parse_escape
+from pytermfx.keys import Key
+
+def test_function_keys():
+    assert list(parse_escape("\x1bOP")) == [Key(name="f1")]
+    assert list(parse_escape("\x1b[11~")) == [Key(name="f1")]
+
+def test_modified_function_keys():
+    # xterm sends modified F1-F4 as CSI 1;<mod> P-S
+    for final, name in zip("PQRS", ("f1", "f2", "f3", "f4")):
+        assert list(parse_escape("\x1b[1;5" + final)) == [Key(name=name, ctrl=True)]
+        assert list(parse_escape("\x1b[1;2" + final)) == [Key(name=name, shift=True)]
+        assert list(parse_escape("\x1b[1;6" + final)) == [Key(name=name, ctrl=True, shift=True)]
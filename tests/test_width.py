@@ -0,0 +1,14 @@
+from pytermfx.width import width
+
+def test_unassigned_code_points():
+    # unassigned, outside the blocks reserved for wide characters
+    assert width("͸") == 1
+    assert width("԰") == 1
+    # unassigned, in blocks reserved for CJK ideographs and emoji
+    assert width("﩮") == 2
+    assert width("\U0001fa75") == 2
+
+def test_wide_and_zero_width():
+    assert width("一") == 2
+    assert width("á") == 1
+    assert width("abc") == 3